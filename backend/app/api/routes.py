@@ -1,10 +1,22 @@
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from collections.abc import Callable
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
+import orjson
 import requests
 from app.schemas.models import (
     BacktestRequest,
+    BatchBacktestRequest,
+    BatchDatasetImportRequest,
+    BatchSaveStrategyRequest,
     CreateStrategyRequest,
     DeleteStrategyRequest,
     DatasetImportRequest,
+    GridBacktestRequest,
     OptimizeRequest,
     PaperTradeStartRequest,
     RenameStrategyRequest,
@@ -19,15 +31,23 @@ from app.services.market_data_service import MarketDataService
 
 router = APIRouter(prefix="/api")
 
+_HEALTH_RESPONSE = ORJSONResponse({"status": "ok"})
+_SAVE_STRATEGY_ADAPTER = TypeAdapter(SaveStrategyRequest)
 
-@router.get("/health")
-def health() -> dict:
-    return {"status": "ok"}
 
+async def _run_cpu_bound(request: Request, fn: Callable, *args: object):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app.state.cpu_pool, fn, *args)
 
-@router.get("/strategies")
-def list_strategies() -> list[dict]:
-    return FileService.list_strategies()
+
+@router.get("/health", response_class=ORJSONResponse)
+async def health() -> ORJSONResponse:
+    return _HEALTH_RESPONSE
+
+
+@router.get("/strategies", response_class=ORJSONResponse)
+def list_strategies() -> ORJSONResponse:
+    return ORJSONResponse(FileService.list_strategies())
 
 
 @router.get("/strategies/{path:path}")
@@ -51,15 +71,55 @@ def strategy_params(path: str) -> dict:
         raise HTTPException(status_code=400, detail=str(exc))
 
 
-@router.post("/strategies")
-def save_strategy(payload: SaveStrategyRequest) -> dict:
+# Editor autosave hits this on every change; parse with orjson and a prebuilt adapter
+# instead of FastAPI's generic body dependency.
+@router.post(
+    "/strategies",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": SaveStrategyRequest.model_json_schema()}},
+        }
+    },
+)
+async def save_strategy(request: Request) -> dict:
+    try:
+        payload = _SAVE_STRATEGY_ADAPTER.validate_python(orjson.loads(await request.body()))
+    except orjson.JSONDecodeError as exc:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "json_invalid",
+                    "loc": ("body", exc.pos),
+                    "msg": "JSON decode error",
+                    "input": {},
+                    "ctx": {"error": exc.msg},
+                }
+            ]
+        )
+    except ValidationError as exc:
+        # Same error locations FastAPI reports when it validates the body itself.
+        errors = exc.errors(include_url=False)
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in errors])
     try:
-        FileService.save_strategy(payload.path, payload.content)
+        await run_in_threadpool(FileService.save_strategy, payload.path, payload.content)
         return {"status": "saved", "path": payload.path}
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
 
+@router.post("/strategies/batch")
+def save_strategies_batch(payload: BatchSaveStrategyRequest) -> list[dict]:
+    results: list[dict] = []
+    for item in payload.items:
+        try:
+            FileService.save_strategy(item.path, item.content)
+            results.append({"status": "saved", "path": item.path})
+        except ValueError as exc:
+            results.append({"status": "error", "path": item.path, "detail": str(exc)})
+    return results
+
+
 @router.post("/strategies/create")
 def create_strategy(payload: CreateStrategyRequest) -> dict:
     try:
@@ -94,17 +154,47 @@ def delete_strategy(payload: DeleteStrategyRequest) -> dict:
 
 
 @router.post("/backtests/run")
-def run_backtest(payload: BacktestRequest) -> dict:
+async def run_backtest(payload: BacktestRequest, request: Request) -> dict:
+    try:
+        return await _run_cpu_bound(request, BacktestService.run_backtest, dict(payload))
+    except (FileNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/backtests/batch")
+def run_backtests_batch(payload: BatchBacktestRequest, request: Request) -> list[dict]:
+    runs = BacktestService.run_many([dict(item) for item in payload.items], executor=request.app.state.cpu_pool)
+    results: list[dict] = []
+    for item, run in zip(payload.items, runs):
+        if isinstance(run, (FileNotFoundError, ValueError)):
+            results.append({"status": "error", "strategy_path": item.strategy_path, "detail": str(run)})
+        elif isinstance(run, requests.RequestException):
+            results.append(
+                {"status": "error", "strategy_path": item.strategy_path, "detail": f"Remote data provider error: {run}"}
+            )
+        elif isinstance(run, Exception):
+            raise run
+        else:
+            results.append({"status": "completed", **run})
+    return results
+
+
+@router.post("/backtests/grid")
+def run_backtest_grid(payload: GridBacktestRequest, request: Request) -> list[dict]:
+    data = dict(payload)
+    grid = data.pop("grid")
     try:
-        return BacktestService.run_backtest(payload.model_dump())
+        return BacktestService.run_grid(data, grid, executor=request.app.state.cpu_pool)
     except (FileNotFoundError, ValueError) as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    except requests.RequestException as exc:
+        raise HTTPException(status_code=502, detail=f"Remote data provider error: {exc}")
 
 
 @router.post("/optimize/run")
-def run_optimize(payload: OptimizeRequest) -> dict:
+async def run_optimize(payload: OptimizeRequest, request: Request) -> dict:
     try:
-        return OptimizeService.run_optimization(payload.model_dump())
+        return await _run_cpu_bound(request, OptimizeService.run_optimization, dict(payload))
     except (FileNotFoundError, ValueError) as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except requests.RequestException as exc:
@@ -116,7 +206,7 @@ def run_optimize(payload: OptimizeRequest) -> dict:
 @router.post("/datasets/import")
 def import_dataset(payload: DatasetImportRequest) -> dict:
     try:
-        return DatasetService.import_dataset(payload.model_dump())
+        return DatasetService.import_dataset(dict(payload))
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
     except ValueError as exc:
@@ -125,9 +215,22 @@ def import_dataset(payload: DatasetImportRequest) -> dict:
         raise HTTPException(status_code=502, detail=f"Remote data provider error: {exc}")
 
 
-@router.get("/datasets")
-def list_datasets() -> list[dict]:
-    return DatasetService.list_datasets()
+@router.post("/datasets/batch")
+def import_datasets_batch(payload: BatchDatasetImportRequest) -> list[dict]:
+    results: list[dict] = []
+    for item in payload.items:
+        try:
+            results.append({"status": "imported", **DatasetService.import_dataset(dict(item))})
+        except (FileNotFoundError, ValueError) as exc:
+            results.append({"status": "error", "source": item.source, "detail": str(exc)})
+        except requests.RequestException as exc:
+            results.append({"status": "error", "source": item.source, "detail": f"Remote data provider error: {exc}"})
+    return results
+
+
+@router.get("/datasets", response_class=ORJSONResponse)
+def list_datasets() -> ORJSONResponse:
+    return ORJSONResponse(DatasetService.list_datasets())
 
 
 @router.get("/symbols/search")
@@ -141,18 +244,20 @@ def search_symbols(q: str = Query(default="", min_length=1), limit: int = 8) ->
 
 
 @router.post("/paper/start")
-def start_paper(payload: PaperTradeStartRequest) -> dict:
+def start_paper(payload: PaperTradeStartRequest, background_tasks: BackgroundTasks) -> dict:
     try:
-        return PaperService.start_session(payload.model_dump())
+        session = PaperService.start_session(dict(payload))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
-    except requests.RequestException as exc:
-        raise HTTPException(status_code=502, detail=f"Broker error: {exc}")
+    if session["status"] == "pending":
+        # Respond before the broker round-trip; clients poll the session for the account.
+        background_tasks.add_task(PaperService.fetch_account, session["session_id"])
+    return session
 
 
-@router.get("/paper/sessions")
-def list_paper_sessions() -> list[dict]:
-    return PaperService.list_sessions()
+@router.get("/paper/sessions", response_class=ORJSONResponse)
+async def list_paper_sessions() -> ORJSONResponse:
+    return ORJSONResponse(PaperService.list_sessions())
 
 
 @router.get("/paper/sessions/{session_id}/state")
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2]
@@ -5,6 +6,23 @@ DATA_DIR = BASE_DIR / "data"
 STRATEGIES_DIR = DATA_DIR / "strategies"
 DATASETS_DIR = DATA_DIR / "datasets"
 BACKTESTS_DIR = DATA_DIR / "backtests"
+CACHE_DIR = DATA_DIR / "cache"
+BARS_CACHE_DIR = CACHE_DIR / "alpaca_bars"
+OPTUNA_DB_PATH = CACHE_DIR / "optuna.db"
 
-for folder in (DATA_DIR, STRATEGIES_DIR, DATASETS_DIR, BACKTESTS_DIR):
-    folder.mkdir(parents=True, exist_ok=True)
+# Threads serving blocking I/O routes, and processes running backtests/optimizations.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+PAPER_SESSION_TTL = int(os.getenv("PAPER_SESSION_TTL", "3600"))
+
+_dirs_ready = False
+
+
+def ensure_dirs() -> None:
+    """Create the data folders once per process; cheap to call before every write."""
+    global _dirs_ready
+    if _dirs_ready:
+        return
+    for folder in (STRATEGIES_DIR, DATASETS_DIR, BACKTESTS_DIR, BARS_CACHE_DIR):
+        folder.mkdir(parents=True, exist_ok=True)
+    _dirs_ready = True
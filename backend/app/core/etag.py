@@ -0,0 +1,34 @@
+import hashlib
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+ETAG_PATHS = {"/api/strategies", "/api/datasets", "/api/paper/sessions"}
+ETAG_PREFIXES = ("/api/strategies/",)
+
+
+class ETagMiddleware(BaseHTTPMiddleware):
+    """Answer conditional GETs on polled endpoints with 304 Not Modified."""
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        response = await call_next(request)
+        path = request.url.path
+        if (
+            request.method != "GET"
+            or response.status_code != 200
+            or (path not in ETAG_PATHS and not path.startswith(ETAG_PREFIXES))
+        ):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in {tag.strip() for tag in if_none_match.split(",")}:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        # Keep the raw header list: repeated headers such as set-cookie survive, and the body is unchanged.
+        buffered = Response(content=body, status_code=response.status_code)
+        buffered.raw_headers = list(response.raw_headers)
+        buffered.headers["etag"] = etag
+        return buffered
@@ -1,9 +1,39 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api.routes import router
+from app.core.config import CPU_WORKERS, THREADPOOL_SIZE, ensure_dirs
+from app.core.etag import ETagMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_dirs()
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # Spawned workers keep CPU-bound backtests off the GIL shared with I/O routes.
+    app.state.cpu_pool = ProcessPoolExecutor(
+        max_workers=CPU_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    try:
+        yield
+    finally:
+        app.state.cpu_pool.shutdown(cancel_futures=True)
 
-app = FastAPI(title="Trading Strategy Framework API", version="0.1.0")
 
+app = FastAPI(
+    title="Trading Strategy Framework API",
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
+
+app.add_middleware(ETagMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -1,5 +1,11 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.core.config import CPU_WORKERS
+
+
+class RequestModel(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
 
 
 class StrategyFile(BaseModel):
@@ -8,25 +14,29 @@ class StrategyFile(BaseModel):
     updated_at: datetime
 
 
-class SaveStrategyRequest(BaseModel):
+class SaveStrategyRequest(RequestModel):
     path: str = Field(min_length=1)
     content: str
 
 
-class CreateStrategyRequest(BaseModel):
+class BatchSaveStrategyRequest(RequestModel):
+    items: list[SaveStrategyRequest] = Field(min_length=1)
+
+
+class CreateStrategyRequest(RequestModel):
     path: str = "new_strategy.py"
 
 
-class RenameStrategyRequest(BaseModel):
+class RenameStrategyRequest(RequestModel):
     old_path: str = Field(min_length=1)
     new_path: str = Field(min_length=1)
 
 
-class DeleteStrategyRequest(BaseModel):
+class DeleteStrategyRequest(RequestModel):
     path: str = Field(min_length=1)
 
 
-class BacktestRequest(BaseModel):
+class BacktestRequest(RequestModel):
     strategy_path: str
     symbol: str = "AAPL"
     interval: str = "1m"
@@ -38,6 +48,14 @@ class BacktestRequest(BaseModel):
     exchange: str | None = None
 
 
+class GridBacktestRequest(BacktestRequest):
+    grid: dict[str, list[float | int]] = Field(min_length=1)
+
+
+class BatchBacktestRequest(RequestModel):
+    items: list[BacktestRequest] = Field(min_length=1)
+
+
 class TradeMarker(BaseModel):
     time: str
     price: float
@@ -53,7 +71,7 @@ class BacktestResponse(BaseModel):
     markers: list[TradeMarker]
 
 
-class OptimizeRequest(BaseModel):
+class OptimizeRequest(RequestModel):
     strategy_path: str
     symbol: str = "AAPL"
     interval: str = "1m"
@@ -64,9 +82,13 @@ class OptimizeRequest(BaseModel):
     seed: int | None = None
     split_pct: float = 70.0
     ranges: dict[str, dict[str, float]] | None = None
+    # -1 means all CPU workers; more than that would only oversubscribe the host.
+    n_jobs: int = Field(default=1, ge=-1, le=CPU_WORKERS)
+    sampler: str = "tpe"
+    resume: bool = True
 
 
-class DatasetImportRequest(BaseModel):
+class DatasetImportRequest(RequestModel):
     source: str
     symbol: str | None = None
     interval: str | None = None
@@ -75,7 +97,11 @@ class DatasetImportRequest(BaseModel):
     timeframe: str | None = None
 
 
-class PaperTradeStartRequest(BaseModel):
+class BatchDatasetImportRequest(RequestModel):
+    items: list[DatasetImportRequest] = Field(min_length=1)
+
+
+class PaperTradeStartRequest(RequestModel):
     strategy_path: str
     symbol: str
     interval: str = "1m"
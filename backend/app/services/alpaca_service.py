@@ -1,30 +1,148 @@
 from __future__ import annotations
 
+import hashlib
 import os
-from datetime import datetime, timezone
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+import orjson
 import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.config import BARS_CACHE_DIR, ensure_dirs
+from app.core.singleflight import SingleFlight
 
 PAPER_BASE_URL = "https://paper-api.alpaca.markets"
 DATA_BASE_URL = "https://data.alpaca.markets"
+# Oldest cached bar windows are removed once the directory holds more than this many.
+BARS_CACHE_MAX_FILES = 256
+
+_TIMEFRAME_RE = re.compile(r"(\d+)(Min|T|Hour|H|Day|D|Week|W|Month|M)")
+_TIMEFRAME_UNITS = {
+    "Min": timedelta(minutes=1),
+    "T": timedelta(minutes=1),
+    "Hour": timedelta(hours=1),
+    "H": timedelta(hours=1),
+    "Day": timedelta(days=1),
+    "D": timedelta(days=1),
+    "Week": timedelta(weeks=1),
+    "W": timedelta(weeks=1),
+    "Month": timedelta(days=31),
+    "M": timedelta(days=31),
+}
+
+
+@lru_cache(maxsize=1)
+def _auth_headers(key: str, secret: str) -> tuple[tuple[str, str], ...]:
+    return (
+        ("APCA-API-KEY-ID", key),
+        ("APCA-API-SECRET-KEY", secret),
+    )
+
+
+_BARS_FLIGHTS = SingleFlight()
+# Paper sessions and the account page poll this; a few seconds of staleness is fine.
+_ACCOUNT_CACHE: TTLCache = TTLCache(maxsize=1, ttl=30)
+_ACCOUNT_CACHE_LOCK = threading.Lock()
+
+
+def _iso_z(dt: datetime) -> str:
+    # Naive datetimes are treated as UTC, matching datetime.utcnow() callers.
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _window_closed(timeframe: str, end: datetime) -> bool:
+    # A window reaching into the still-forming bar would freeze that partial bar on disk.
+    match = _TIMEFRAME_RE.fullmatch(timeframe)
+    if match is None:
+        return False
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    return end + int(match.group(1)) * _TIMEFRAME_UNITS[match.group(2)] <= datetime.now(timezone.utc)
+
+
+def _read_cached_bars(cache_path: Path) -> dict | None:
+    try:
+        return orjson.loads(cache_path.read_bytes())
+    except FileNotFoundError:
+        # Never written, or pruned between lookup and read.
+        return None
+
+
+def _prune_bars_cache() -> None:
+    entries = [entry for entry in os.scandir(BARS_CACHE_DIR) if entry.name.endswith(".json")]
+    if len(entries) <= BARS_CACHE_MAX_FILES:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+    for entry in entries[: len(entries) - BARS_CACHE_MAX_FILES]:
+        try:
+            os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
 
 
 class AlpacaService:
+    _session: requests.Session | None = None
+    _session_credentials: tuple[str, str] | None = None
+    _session_lock = threading.Lock()
+
     @staticmethod
-    def _headers() -> dict[str, str]:
+    def _credentials() -> tuple[str, str]:
         key = os.getenv("ALPACA_API_KEY")
         secret = os.getenv("ALPACA_API_SECRET")
         if not key or not secret:
             raise ValueError("Missing ALPACA_API_KEY or ALPACA_API_SECRET environment variables")
-        return {
-            "APCA-API-KEY-ID": key,
-            "APCA-API-SECRET-KEY": secret,
-        }
+        return key, secret
+
+    @classmethod
+    def _headers(cls) -> dict[str, str]:
+        return dict(_auth_headers(*cls._credentials()))
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        credentials = cls._credentials()
+        if cls._session is not None and cls._session_credentials == credentials:
+            return cls._session
+        with cls._session_lock:
+            if cls._session is None or cls._session_credentials != credentials:
+                if cls._session is not None:
+                    cls._session.close()
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=16,
+                    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504]),
+                )
+                session.mount("https://", adapter)
+                session.headers.update(_auth_headers(*credentials))
+                cls._session = session
+                cls._session_credentials = credentials
+            return cls._session
 
     @classmethod
     def get_account(cls) -> dict:
-        response = requests.get(f"{PAPER_BASE_URL}/v2/account", headers=cls._headers(), timeout=15)
+        credentials = cls._credentials()
+        with _ACCOUNT_CACHE_LOCK:
+            cached = _ACCOUNT_CACHE.get(credentials)
+        if cached is not None:
+            return dict(cached)
+        # One-off call: don't leave an idle TLS connection to the trading host in the pool.
+        response = cls._get_session().get(
+            f"{PAPER_BASE_URL}/v2/account",
+            headers={"Connection": "close"},
+            timeout=15,
+        )
         response.raise_for_status()
-        return response.json()
+        account = orjson.loads(response.content)
+        with _ACCOUNT_CACHE_LOCK:
+            _ACCOUNT_CACHE[credentials] = account
+        return dict(account)
 
     @classmethod
     def fetch_bars(
@@ -40,17 +158,51 @@ class AlpacaService:
         params = {
             "symbols": symbol,
             "timeframe": timeframe,
-            "start": start.replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z"),
-            "end": end.replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z"),
+            "start": _iso_z(start),
+            "end": _iso_z(end),
             "limit": str(limit),
             "adjustment": adjustment,
             "feed": feed,
         }
-        response = requests.get(
-            f"{DATA_BASE_URL}/v2/stocks/bars",
-            headers=cls._headers(),
-            params=params,
-            timeout=20,
-        )
-        response.raise_for_status()
-        return response.json()
+        cache_key = hashlib.blake2b("|".join(params.values()).encode(), digest_size=16).hexdigest()
+        cache_path = BARS_CACHE_DIR / f"{cache_key}.json" if _window_closed(timeframe, end) else None
+        if cache_path is not None:
+            cached = _read_cached_bars(cache_path)
+            if cached is not None:
+                return cached
+        # Parallel optimization trials tend to ask for the same window at once.
+        return _BARS_FLIGHTS.do(cache_key, lambda: cls._download_bars(symbol, params, cache_path))
+
+    @classmethod
+    def _download_bars(cls, symbol: str, params: dict[str, str], cache_path: Path | None) -> dict:
+        if cache_path is not None:
+            cached = _read_cached_bars(cache_path)
+            if cached is not None:
+                return cached
+
+        session = cls._get_session()
+        bars: list[dict] = []
+        while True:
+            response = session.get(
+                f"{DATA_BASE_URL}/v2/stocks/bars",
+                params=params,
+                timeout=20,
+            )
+            response.raise_for_status()
+            page = orjson.loads(response.content)
+            bars.extend((page.get("bars") or {}).get(symbol) or [])
+            next_page_token = page.get("next_page_token")
+            if not next_page_token:
+                break
+            params["page_token"] = next_page_token
+        data = {"bars": {symbol: bars}, "next_page_token": None}
+        if cache_path is None:
+            return data
+
+        # Write-then-rename so concurrent readers never see a partial file.
+        ensure_dirs()
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(orjson.dumps(data))
+        os.replace(tmp_path, cache_path)
+        _prune_bars_cache()
+        return data
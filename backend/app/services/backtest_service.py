@@ -1,82 +1,192 @@
 from __future__ import annotations
 
-import json
-from collections.abc import Mapping
+import hashlib
+import itertools
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import weakref
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
 from inspect import isclass
 from numbers import Integral, Real
+from pathlib import Path
 from uuid import uuid4
 
 import backtrader as bt
+import numpy as np
+import orjson
 import pandas as pd
+from cachetools import LRUCache
 
-from app.core.config import BACKTESTS_DIR
+from app.core.config import BACKTESTS_DIR, CPU_WORKERS, ensure_dirs
+from app.services import vector_engine
 from app.services.market_data_service import MarketDataService
-from app.services.strategy_loader import load_strategy_module, load_strategy_params
+from app.services.strategy_loader import load_strategy_module, module_params
+
+# Loaded strategy module -> its resolved strategy class; entries die with reloaded modules.
+_STRATEGY_CLASSES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+# Loaded strategy module -> its INDICATORS entries, validated and normalized once.
+_INDICATOR_TEMPLATES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+# (source content digest, indicator type, period) -> computed series; results are read-only.
+_INDICATOR_CACHE: LRUCache = LRUCache(maxsize=256)
+_INDICATOR_CACHE_LOCK = threading.Lock()
+
+
+# orjson only calls the default hook for types it can't encode natively; dispatch on exact type first.
+_JSON_FALLBACKS = {
+    Decimal: float,
+    set: list,
+    frozenset: list,
+    np.ndarray: np.ndarray.tolist,
+}
+
+
+@lru_cache(maxsize=64)
+def _wma_weights(period: int) -> np.ndarray:
+    weights = np.arange(1, period + 1, dtype=np.float64)
+    weights /= weights.sum()
+    weights.setflags(write=False)
+    return weights
+
+
+def _json_default(value: object) -> object:
+    handler = _JSON_FALLBACKS.get(type(value))
+    if handler is not None:
+        return handler(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _write_result(run_id: str, out: dict) -> None:
+    ensure_dirs()
+    (BACKTESTS_DIR / f"{run_id}.json").write_bytes(
+        orjson.dumps(out, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    )
 
 
-class SmaCrossStrategy(bt.Strategy):
-    params = (
-        ("fast_period", 10),
-        ("slow_period", 30),
-        ("risk_pct", 1.0),
-    )
+# Executor threads are joined at interpreter exit, so queued results still reach disk.
+_PERSIST_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="backtest-persist")
 
-    def __init__(self) -> None:
-        self._markers: list[dict] = []
-        self._equity_curve: list[dict] = []
-        self._wins = 0
-        self._closed = 0
+# OHLCV frame shared by every parameter set evaluated in a frame_pool worker process.
+_grid_frame: pd.DataFrame | None = None
+_grid_arrays: dict | None = None
 
-        fast = bt.indicators.SimpleMovingAverage(self.data.close, period=int(self.params.fast_period))
-        slow = bt.indicators.SimpleMovingAverage(self.data.close, period=int(self.params.slow_period))
-        self.cross = bt.indicators.CrossOver(fast, slow)
 
-    def next(self) -> None:
-        dt = self.data.datetime.datetime(0).isoformat()
-        self._equity_curve.append({"time": dt, "value": round(float(self.broker.getvalue()), 2)})
+def _init_grid_worker(shared_dir: str, columns: list[str]) -> None:
+    global _grid_frame, _grid_arrays
+    # Read-only memory maps: every worker views the same page-cache pages, nothing is unpickled.
+    values = np.load(Path(shared_dir) / "values.npy", mmap_mode="r")
+    index = pd.DatetimeIndex(np.load(Path(shared_dir) / "index.npy"))
+    _grid_frame = pd.DataFrame(values.T, index=index, columns=columns, copy=False)
+    _grid_arrays = BacktestService._prepare_frame(_grid_frame)
 
-        if not self.position and self.cross > 0:
-            close = float(self.data.close[0])
-            risk_cash = float(self.broker.getcash()) * (float(self.params.risk_pct) / 100.0)
-            size = max(int(risk_cash / close), 1)
-            self.buy(size=size)
-        elif self.position and self.cross < 0:
-            self.close()
 
-    def notify_order(self, order: bt.Order) -> None:
-        if order.status != order.Completed:
-            return
+def _run_grid_point(payload: dict, params: dict) -> dict:
+    return _grid_point_result(payload, params, _grid_frame, _grid_arrays)
 
-        side = "buy" if order.isbuy() else "sell"
-        self._markers.append(
-            {
-                "time": self.data.datetime.datetime(0).isoformat(),
-                "price": round(float(order.executed.price), 4),
-                "side": side,
-            }
-        )
 
-    def notify_trade(self, trade: bt.Trade) -> None:
-        if not trade.isclosed:
-            return
-        self._closed += 1
-        if trade.pnlcomm > 0:
-            self._wins += 1
+def _run_grid_chunk(payload: dict, frame: pd.DataFrame, combos: list[dict]) -> list[dict]:
+    # One task per slice of the grid, so the frame is pickled and prepared once per slice, not per point.
+    arrays = BacktestService._prepare_frame(frame)
+    return [_grid_point_result(payload, params, frame, arrays) for params in combos]
+
+
+def _grid_point_result(payload: dict, params: dict, frame: pd.DataFrame, arrays: dict) -> dict:
+    result = BacktestService._execute(payload, persist=False, params_override=params, frame_override=frame, arrays_override=arrays)
+    return {
+        "params": params,
+        "final_value": result["final_value"],
+        "pnl": result["pnl"],
+        "pnl_pct": result["pnl_pct"],
+        "win_rate": result["win_rate"],
+        "analytics": result["analytics"],
+    }
+
+
+def _feed_rows(index: pd.DatetimeIndex, columns: Mapping[str, np.ndarray]) -> list[tuple[float, ...]]:
+    stamps = index.to_numpy(dtype="datetime64[ns]")
+    # Same terms as bt.date2num, summed with math.fsum like it does, so datetimes match bit for bit.
+    day_start = stamps.astype("datetime64[D]")
+    since_midnight = (stamps - day_start).astype(np.int64)
+    hours, rem = np.divmod(since_midnight, 3_600_000_000_000)
+    minutes, rem = np.divmod(rem, 60_000_000_000)
+    seconds, rem = np.divmod(rem, 1_000_000_000)
+    terms = (
+        (day_start.astype(np.int64) + 719163).astype(np.float64),
+        hours / 24.0,
+        minutes / 1440.0,
+        seconds / 86400.0,
+        (rem // 1000) / 86400000000.0,
+    )
+    dtnums = list(map(math.fsum, zip(*(t.tolist() for t in terms))))
+    return list(zip(dtnums, *(columns[col].tolist() for col in _FEED_COLUMNS)))
+
+
+class ArrayOHLCVData(bt.feed.DataBase):
+    """Preloads bars from prebuilt (datetime, open, high, low, close, volume) rows; PandasData reads every cell through iloc."""
+
+    params = (("rows", None),)
+
+    def start(self) -> None:
+        super().start()
+        self._rows = self.p.rows
+        self._idx = 0
+
+    def _load(self) -> bool:
+        if self._idx >= len(self._rows):
+            return False
+        dtnum, open_, high, low, close, volume = self._rows[self._idx]
+        self._idx += 1
+        lines = self.lines
+        lines.datetime[0] = dtnum
+        lines.open[0] = open_
+        lines.high[0] = high
+        lines.low[0] = low
+        lines.close[0] = close
+        lines.volume[0] = volume
+        return True
 
 
 class EquityCurveAnalyzer(bt.Analyzer):
+    params = (("bar_times", None),)
+
     def start(self) -> None:
-        self._curve: list[dict] = []
+        # One preallocated slot per bar; the dicts are only built once in get_analysis().
+        self._values = np.full(max(self.strategy.data.buflen(), 1), np.nan)
 
     def next(self) -> None:
-        dt = self.strategy.data.datetime.datetime(0).isoformat()
-        self._curve.append({"time": dt, "value": round(float(self.strategy.broker.getvalue()), 2)})
+        pos = len(self.strategy.data) - 1
+        if pos >= len(self._values):
+            self._values = np.concatenate([self._values, np.full(len(self._values), np.nan)])
+        self._values[pos] = self.strategy.broker.getvalue()
 
     def get_analysis(self) -> list[dict]:
-        return self._curve
+        filled = np.flatnonzero(~np.isnan(self._values)).tolist()
+        bar_times = self.p.bar_times
+        if bar_times is None:
+            stamps = self.strategy.data.datetime.array
+            bar_times = {i: bt.num2date(stamps[i]).isoformat() for i in filled}
+        return [
+            {"time": bar_times[i], "value": round(v, 2)}
+            for i, v in zip(filled, self._values[filled].tolist())
+        ]
 
 
 class TradeMarkerAnalyzer(bt.Analyzer):
+    params = (("bar_times", None),)
+
     def start(self) -> None:
         self._markers: list[dict] = []
 
@@ -84,9 +194,15 @@ class TradeMarkerAnalyzer(bt.Analyzer):
         if order.status != order.Completed:
             return
         side = "buy" if order.isbuy() else "sell"
+        bar_times = self.p.bar_times
+        # Orders are notified on the bar they filled, so the current bar index is the fill bar.
+        if bar_times is not None:
+            dt = bar_times[len(self.strategy.data) - 1]
+        else:
+            dt = bt.num2date(order.executed.dt).isoformat()
         self._markers.append(
             {
-                "time": bt.num2date(order.executed.dt).isoformat(),
+                "time": dt,
                 "price": round(float(order.executed.price), 4),
                 "side": side,
             }
@@ -96,8 +212,61 @@ class TradeMarkerAnalyzer(bt.Analyzer):
         return self._markers
 
 
+# Backtrader indicators whose buffers match _compute_indicator bar for bar.
+_REUSABLE_INDICATORS = {
+    bt.indicators.SimpleMovingAverage: "sma",
+    bt.indicators.WeightedMovingAverage: "wma",
+}
+_FEED_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(slots=True, frozen=True)
+class IndicatorSpec:
+    id: str
+    type: str
+    source: str
+    period: int
+    label: str
+    color: str
+
+
+class ProgressAnalyzer(bt.Analyzer):
+    """Hands (bars seen, portfolio value) to a callback every `every` bars, e.g. for trial pruning."""
+
+    params = (("callback", None), ("every", 500))
+
+    def next(self) -> None:
+        bars = len(self.data)
+        if bars % self.p.every == 0:
+            self.p.callback(bars, self.strategy.broker.getvalue())
+
+
+class IndicatorSeriesAnalyzer(bt.Analyzer):
+    def start(self) -> None:
+        self._series: dict[tuple[str, str, int], np.ndarray] = {}
+
+    def stop(self) -> None:
+        feed_lines = self.strategy.data.lines
+        for indicator in self.strategy.getindicators():
+            itype = _REUSABLE_INDICATORS.get(type(indicator))
+            if itype is None:
+                continue
+            line = indicator.data.lines[0]
+            source = next((col for col in _FEED_COLUMNS if getattr(feed_lines, col) is line), None)
+            if source is None:
+                continue
+            key = (itype, source, int(indicator.p.period))
+            self._series.setdefault(key, np.array(indicator.lines[0].array, dtype=np.float64))
+
+    def get_analysis(self) -> dict[tuple[str, str, int], np.ndarray]:
+        return self._series
+
+
 class BacktestService:
     SUPPORTED_INDICATORS = {"sma", "ema", "wma", "rsi"}
+    COMMISSION = 0.001
+    MAX_GRID_POINTS = 500
+    PROGRESS_BARS = 200
 
     @staticmethod
     def _to_float(value: object, default: float = 0.0) -> float:
@@ -107,41 +276,20 @@ class BacktestService:
             return default
 
     @staticmethod
-    def _normalize_value(value: object) -> object:
-        if isinstance(value, Mapping):
-            return {str(k): BacktestService._normalize_value(v) for k, v in value.items()}
-        if isinstance(value, (list, tuple, set)):
-            return [BacktestService._normalize_value(v) for v in value]
-        if isinstance(value, (str, int, float, bool)) or value is None:
-            return value
-        try:
-            return float(value)  # e.g. Decimal
-        except (TypeError, ValueError):
-            return str(value)
-
-    @staticmethod
-    def _default_indicator_specs(params: dict) -> list[dict]:
+    def _default_indicator_specs(params: dict) -> list[IndicatorSpec]:
+        fast = int(params.get("fast_period", 10))
+        slow = int(params.get("slow_period", 30))
         return [
-            {
-                "id": "sma_fast",
-                "type": "sma",
-                "source": "close",
-                "period": int(params.get("fast_period", 10)),
-                "label": f"SMA({int(params.get('fast_period', 10))})",
-                "color": "#ffd166",
-            },
-            {
-                "id": "sma_slow",
-                "type": "sma",
-                "source": "close",
-                "period": int(params.get("slow_period", 30)),
-                "label": f"SMA({int(params.get('slow_period', 30))})",
-                "color": "#60a5fa",
-            },
+            IndicatorSpec(id="sma_fast", type="sma", source="close", period=fast, label=f"SMA({fast})", color="#ffd166"),
+            IndicatorSpec(id="sma_slow", type="sma", source="close", period=slow, label=f"SMA({slow})", color="#60a5fa"),
         ]
 
     @staticmethod
     def _resolve_strategy_class(strategy_module: object) -> type[bt.Strategy]:
+        cached = _STRATEGY_CLASSES.get(strategy_module)
+        if cached is not None:
+            return cached
+
         # First bt.Strategy subclass declared in this module.
         module_name = getattr(strategy_module, "__name__", "")
         for candidate in vars(strategy_module).values():
@@ -151,6 +299,7 @@ class BacktestService:
                 and candidate is not bt.Strategy
                 and getattr(candidate, "__module__", None) == module_name
             ):
+                _STRATEGY_CLASSES[strategy_module] = candidate
                 return candidate
 
         raise ValueError(
@@ -159,7 +308,7 @@ class BacktestService:
         )
 
     @staticmethod
-    def _strategy_param_keys(strategy_class: type[bt.Strategy]) -> set[str]:
+    def _scan_param_keys(strategy_class: type[bt.Strategy]) -> set[str]:
         raw_params = getattr(strategy_class, "params", None)
         if raw_params is None:
             return set()
@@ -183,7 +332,7 @@ class BacktestService:
         return set()
 
     @staticmethod
-    def _strategy_param_defaults(strategy_class: type[bt.Strategy]) -> dict[str, object]:
+    def _scan_param_defaults(strategy_class: type[bt.Strategy]) -> dict[str, object]:
         raw_params = getattr(strategy_class, "params", None)
         if raw_params is None:
             return {}
@@ -206,6 +355,27 @@ class BacktestService:
 
         return {}
 
+    @staticmethod
+    def _strategy_param_info(strategy_class: type[bt.Strategy]) -> tuple[frozenset[str], dict[str, object]]:
+        # Stored on the class itself (not inherited) so sweeps resolve params with one attribute read.
+        cached = strategy_class.__dict__.get("_param_info_cache")
+        if cached is not None:
+            return cached
+        info = (
+            frozenset(BacktestService._scan_param_keys(strategy_class)),
+            BacktestService._scan_param_defaults(strategy_class),
+        )
+        setattr(strategy_class, "_param_info_cache", info)
+        return info
+
+    @staticmethod
+    def _strategy_param_keys(strategy_class: type[bt.Strategy]) -> frozenset[str]:
+        return BacktestService._strategy_param_info(strategy_class)[0]
+
+    @staticmethod
+    def _strategy_param_defaults(strategy_class: type[bt.Strategy]) -> dict[str, object]:
+        return dict(BacktestService._strategy_param_info(strategy_class)[1])
+
     @staticmethod
     def _default_optimization_range(default_value: object) -> tuple[float | int, float | int] | None:
         if isinstance(default_value, bool):
@@ -266,7 +436,8 @@ class BacktestService:
     @staticmethod
     def _filter_strategy_params(strategy_class: type[bt.Strategy], params: dict) -> tuple[dict, list[str]]:
         allowed = BacktestService._strategy_param_keys(strategy_class)
-        if not allowed:
+        # Common case in sweeps: every override is a real strategy param, so skip the rebuild.
+        if not allowed or allowed.issuperset(params):
             return params, []
 
         filtered: dict = {}
@@ -279,13 +450,15 @@ class BacktestService:
         return filtered, sorted(ignored)
 
     @staticmethod
-    def _resolve_indicator_specs(strategy_module: object, params: dict) -> list[dict]:
-        raw = getattr(strategy_module, "INDICATORS", None)
-        if not isinstance(raw, list):
-            return []
+    def _indicator_templates(strategy_module: object) -> tuple[tuple, ...]:
+        # INDICATORS is parsed once per loaded module; only period_param lookups depend on the run.
+        cached = _INDICATOR_TEMPLATES.get(strategy_module)
+        if cached is not None:
+            return cached
 
-        specs: list[dict] = []
-        for i, item in enumerate(raw):
+        raw = getattr(strategy_module, "INDICATORS", None)
+        templates: list[tuple] = []
+        for i, item in enumerate(raw if isinstance(raw, list) else []):
             if not isinstance(item, dict):
                 continue
 
@@ -298,9 +471,30 @@ class BacktestService:
             if not indicator_id:
                 continue
 
-            period_value = item.get("period")
             period_param = item.get("period_param")
-            if period_value is None and isinstance(period_param, str):
+            templates.append(
+                (
+                    indicator_id,
+                    itype,
+                    source,
+                    item.get("period"),
+                    period_param if isinstance(period_param, str) else None,
+                    str(item.get("label") or ""),
+                    str(item.get("color") or "").strip(),
+                )
+            )
+
+        result = tuple(templates)
+        _INDICATOR_TEMPLATES[strategy_module] = result
+        return result
+
+    @staticmethod
+    def _resolve_indicator_specs(strategy_module: object, params: dict) -> list[IndicatorSpec]:
+        specs: list[IndicatorSpec] = []
+        for indicator_id, itype, source, period_value, period_param, label, color in (
+            BacktestService._indicator_templates(strategy_module)
+        ):
+            if period_value is None and period_param is not None:
                 period_value = params.get(period_param)
 
             try:
@@ -314,60 +508,220 @@ class BacktestService:
                 period = 14
 
             specs.append(
-                {
-                    "id": indicator_id,
-                    "type": itype,
-                    "source": source,
-                    "period": period,
-                    "label": str(item.get("label") or f"{itype.upper()}({period})"),
-                    "color": str(item.get("color") or ""),
-                }
+                IndicatorSpec(
+                    id=indicator_id,
+                    type=itype,
+                    source=source,
+                    period=period,
+                    label=label or f"{itype.upper()}({period})",
+                    color=color,
+                )
             )
 
         return specs
 
     @staticmethod
-    def _compute_indicator(frame: pd.DataFrame, spec: dict) -> pd.Series:
-        source = spec.get("source", "close")
-        if source not in frame.columns:
-            raise ValueError(f"Indicator source column '{source}' not found")
-
-        series = frame[source].astype(float)
-        period = int(spec.get("period", 14))
-        itype = spec.get("type")
+    def _compute_indicator(values: np.ndarray, spec: IndicatorSpec) -> np.ndarray:
+        # `values` is shared between specs with the same source and must not be written to.
+        period = spec.period
+        itype = spec.type
 
         if itype == "sma":
-            return series.rolling(window=period, min_periods=period).mean()
+            if np.isnan(values).any():
+                return pd.Series(values).rolling(window=period, min_periods=period).mean().to_numpy()
+            # Sliding sum from one cumulative sum: window total = cs[i + period] - cs[i].
+            out = np.full(len(values), np.nan)
+            if period <= len(values):
+                cs = np.concatenate(([0.0], np.cumsum(values)))
+                out[period - 1 :] = (cs[period:] - cs[:-period]) / period
+            return out
         if itype == "ema":
-            return series.ewm(span=period, adjust=False).mean()
+            return pd.Series(values).ewm(span=period, adjust=False).mean().to_numpy()
         if itype == "wma":
-            weights = pd.Series(range(1, period + 1), dtype="float64")
-            return series.rolling(period).apply(
-                lambda values: (values * weights).sum() / weights.sum(), raw=False
-            )
+            weights = _wma_weights(period)
+            out = np.full(len(values), np.nan)
+            if period <= len(values):
+                # (n - period + 1, period) strided view, one matrix-vector product; newest bar weighs most.
+                out[period - 1 :] = np.lib.stride_tricks.sliding_window_view(values, period) @ weights
+            return out
         if itype == "rsi":
-            delta = series.diff()
-            gain = delta.where(delta > 0, 0.0)
-            loss = -delta.where(delta < 0, 0.0)
-            avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean()
-            avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean()
-            rs = avg_gain / avg_loss.replace(0, pd.NA)
-            return 100 - (100 / (1 + rs))
+            delta = np.diff(values, prepend=values[:1])
+            # Smooth gains and losses in one Wilder (alpha=1/period) EWM pass.
+            smoothed = (
+                pd.DataFrame({"gain": np.maximum(delta, 0.0), "loss": np.maximum(-delta, 0.0)})
+                .ewm(alpha=1 / period, adjust=False)
+                .mean()
+            )
+            avg_gain = smoothed["gain"].to_numpy()
+            avg_loss = smoothed["loss"].to_numpy()
+            # Divide in place into a NaN-filled buffer; bars with no average loss stay NaN as before.
+            rsi = np.full(len(values), np.nan)
+            np.divide(avg_gain, avg_loss, out=rsi, where=avg_loss != 0)
+            rsi += 1.0
+            np.divide(100.0, rsi, out=rsi)
+            np.subtract(100.0, rsi, out=rsi)
+            return rsi
 
         raise ValueError(f"Unsupported indicator type '{itype}'")
 
+    @staticmethod
+    def _cached_indicator(values: np.ndarray, digest: bytes, spec: IndicatorSpec) -> np.ndarray:
+        # Sweeps re-run the same bars with the same INDICATORS; only strategy params change.
+        key = (digest, spec.type, spec.period)
+        with _INDICATOR_CACHE_LOCK:
+            cached = _INDICATOR_CACHE.get(key)
+        if cached is not None:
+            return cached
+        result = BacktestService._compute_indicator(values, spec)
+        result.setflags(write=False)
+        with _INDICATOR_CACHE_LOCK:
+            _INDICATOR_CACHE[key] = result
+        return result
+
+    @staticmethod
+    def _prepare_frame(frame: pd.DataFrame) -> dict:
+        # Per-frame work every run needs; optimizations build it once and share it across trials.
+        return {
+            "bar_times": np.datetime_as_string(frame.index.to_numpy(dtype="datetime64[ns]"), unit="s").tolist(),
+            "columns": {
+                col: np.ascontiguousarray(frame[col].to_numpy(dtype=np.float64))
+                for col in _FEED_COLUMNS
+                if col in frame.columns
+            },
+            # Filled on first use: the vectorized path never needs feed rows, and most runs hash no column.
+            "feed_rows": None,
+            "digests": {},
+            # close SMA by period; optimization trials keep revisiting the same integer periods.
+            "sma": LRUCache(maxsize=64),
+        }
+
+    @staticmethod
+    def _run_cerebro(
+        frame: pd.DataFrame,
+        strategy_class: type[bt.Strategy],
+        strategy_params: dict,
+        base: float,
+        arrays: dict,
+        progress: Callable[[int, float], None] | None = None,
+    ) -> dict:
+        bar_times = arrays["bar_times"]
+        if arrays["feed_rows"] is None:
+            arrays["feed_rows"] = _feed_rows(frame.index, arrays["columns"])
+        cerebro = bt.Cerebro(stdstats=False)
+        cerebro.broker.setcash(base)
+        cerebro.broker.setcommission(commission=BacktestService.COMMISSION)
+        feed = ArrayOHLCVData(rows=arrays["feed_rows"])
+        cerebro.adddata(feed)
+        cerebro.addstrategy(strategy_class, **strategy_params)
+        cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+        cerebro.addanalyzer(bt.analyzers.SharpeRatio_A, _name="sharpe")
+        cerebro.addanalyzer(bt.analyzers.Returns, _name="returns")
+        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
+        cerebro.addanalyzer(bt.analyzers.SQN, _name="sqn")
+        cerebro.addanalyzer(EquityCurveAnalyzer, _name="equitycurve", bar_times=bar_times)
+        cerebro.addanalyzer(TradeMarkerAnalyzer, _name="trademarkers", bar_times=bar_times)
+        cerebro.addanalyzer(IndicatorSeriesAnalyzer, _name="indicatorseries")
+        if progress is not None:
+            cerebro.addanalyzer(ProgressAnalyzer, callback=progress, every=BacktestService.PROGRESS_BARS)
+
+        try:
+            result = cerebro.run()
+        except TypeError as exc:
+            raise ValueError(f"Invalid strategy configuration: {exc}") from exc
+        strategy: bt.Strategy = result[0]
+
+        equity_curve = strategy.analyzers.equitycurve.get_analysis()
+        if not isinstance(equity_curve, list):
+            equity_curve = []
+        markers = getattr(strategy, "_markers", [])
+        if not isinstance(markers, list):
+            markers = []
+        if not markers:
+            markers = strategy.analyzers.trademarkers.get_analysis()
+            if not isinstance(markers, list):
+                markers = []
+        return {
+            "final_value": cerebro.broker.getvalue(),
+            "drawdown": strategy.analyzers.drawdown.get_analysis(),
+            "sharpe": strategy.analyzers.sharpe.get_analysis(),
+            "returns": strategy.analyzers.returns.get_analysis(),
+            "trades": strategy.analyzers.trades.get_analysis(),
+            "sqn": strategy.analyzers.sqn.get_analysis(),
+            "equity_curve": equity_curve,
+            "markers": markers,
+            "strategy_series": strategy.analyzers.indicatorseries.get_analysis(),
+        }
+
+    @staticmethod
+    def _vectorized_sma_cross(
+        frame: pd.DataFrame,
+        params: dict,
+        base: float,
+        arrays: dict,
+        progress: Callable[[int, float], None] | None = None,
+    ) -> dict:
+        # Same rules as the SMA-cross template strategy, without Backtrader's per-bar dispatch.
+        try:
+            fast_period = int(params.get("fast_period", 10))
+            slow_period = int(params.get("slow_period", 30))
+            risk_pct = float(params.get("risk_pct", 1.0))
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid strategy configuration: {exc}") from exc
+        if fast_period < 1 or slow_period < 1:
+            raise ValueError("fast_period and slow_period must be >= 1")
+
+        bar_times = arrays["bar_times"]
+        close = arrays["columns"]["close"]
+        sma_cache = arrays["sma"]
+        for period in (fast_period, slow_period):
+            if period not in sma_cache:
+                values = vector_engine.sma(close, period)
+                values.setflags(write=False)
+                sma_cache[period] = values
+        fast = sma_cache[fast_period]
+        slow = sma_cache[slow_period]
+        signals = vector_engine.crossover(fast, slow, max(fast_period, slow_period) - 1)
+        equity, fills, trades, has_open = vector_engine.simulate_long_only(
+            arrays["columns"]["open"],
+            close,
+            signals,
+            base,
+            risk_pct,
+            BacktestService.COMMISSION,
+        )
+        if progress is not None:
+            # Same checkpoints the Backtrader path reports, so a pruner can stop before the stats are built.
+            for bars in range(BacktestService.PROGRESS_BARS, len(equity) + 1, BacktestService.PROGRESS_BARS):
+                progress(bars, float(equity[bars - 1]))
+        trade_summary, sqn = vector_engine.trade_stats(trades, has_open)
+        return {
+            "final_value": float(equity[-1]) if len(equity) else base,
+            "drawdown": vector_engine.drawdown_stats(equity),
+            "sharpe": vector_engine.sharpe_stats(equity, frame.index, base),
+            "returns": vector_engine.returns_stats(equity, frame.index, base),
+            "trades": trade_summary,
+            "sqn": sqn,
+            "equity_curve": [{"time": t, "value": round(v, 2)} for t, v in zip(bar_times, equity.tolist())],
+            "markers": [
+                {"time": bar_times[bar], "price": round(price, 4), "side": side} for bar, price, side in fills
+            ],
+            "strategy_series": {("sma", "close", fast_period): fast, ("sma", "close", slow_period): slow},
+        }
+
     @staticmethod
     def _execute(
         payload: dict,
         persist: bool = True,
         params_override: dict | None = None,
         frame_override: pd.DataFrame | None = None,
+        arrays_override: dict | None = None,
+        progress: Callable[[int, float], None] | None = None,
     ) -> dict:
         run_id = str(uuid4())
         base = float(payload.get("start_cash", 10000.0))
 
         strategy_module = load_strategy_module(payload["strategy_path"])
-        params = load_strategy_params(payload["strategy_path"])
+        params = module_params(strategy_module)
         if payload.get("params"):
             params.update(payload["params"])
         if params_override:
@@ -377,41 +731,34 @@ class BacktestService:
         strategy_class = BacktestService._resolve_strategy_class(strategy_module)
         strategy_params, ignored_strategy_params = BacktestService._filter_strategy_params(strategy_class, params)
 
-        cerebro = bt.Cerebro(stdstats=False)
-        cerebro.broker.setcash(base)
-        cerebro.broker.setcommission(commission=0.001)
-        feed = bt.feeds.PandasData(dataname=frame)
-        cerebro.adddata(feed)
-        cerebro.addstrategy(strategy_class, **strategy_params)
-        cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
-        cerebro.addanalyzer(bt.analyzers.SharpeRatio_A, _name="sharpe")
-        cerebro.addanalyzer(bt.analyzers.Returns, _name="returns")
-        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
-        cerebro.addanalyzer(bt.analyzers.SQN, _name="sqn")
-        cerebro.addanalyzer(EquityCurveAnalyzer, _name="equitycurve")
-        cerebro.addanalyzer(TradeMarkerAnalyzer, _name="trademarkers")
+        # arrays_override must come from _prepare_frame(frame_override).
+        arrays = arrays_override if arrays_override is not None else BacktestService._prepare_frame(frame)
+        # Every bar timestamp is formatted once; analyzers and serializers index into this list.
+        bar_times = arrays["bar_times"]
 
-        try:
-            result = cerebro.run()
-        except TypeError as exc:
-            raise ValueError(f"Invalid strategy configuration: {exc}") from exc
-        strategy: bt.Strategy = result[0]
+        if getattr(strategy_module, "VECTORIZED", None) == "sma_cross":
+            merged_params = BacktestService._strategy_param_defaults(strategy_class)
+            merged_params.update(strategy_params)
+            run = BacktestService._vectorized_sma_cross(frame, merged_params, base, arrays, progress)
+        else:
+            run = BacktestService._run_cerebro(frame, strategy_class, strategy_params, base, arrays, progress)
 
-        final_value = round(float(cerebro.broker.getvalue()), 2)
+        final_value = round(float(run["final_value"]), 2)
         pnl = round(final_value - base, 2)
         pnl_pct = round((pnl / base) * 100.0 if base else 0.0, 4)
 
-        drawdown = strategy.analyzers.drawdown.get_analysis()
-        sharpe = strategy.analyzers.sharpe.get_analysis()
-        returns = strategy.analyzers.returns.get_analysis()
-        trades = strategy.analyzers.trades.get_analysis()
-        sqn = strategy.analyzers.sqn.get_analysis()
+        drawdown = run["drawdown"]
+        sharpe = run["sharpe"]
+        returns = run["returns"]
+        trades = run["trades"]
+        sqn = run["sqn"]
+        # Returned as-is: orjson (with _json_default) and FastAPI's encoder handle the leftovers.
         analyzers_raw = {
-            "drawdown": BacktestService._normalize_value(drawdown),
-            "sharpe": BacktestService._normalize_value(sharpe),
-            "returns": BacktestService._normalize_value(returns),
-            "trades": BacktestService._normalize_value(trades),
-            "sqn": BacktestService._normalize_value(sqn),
+            "drawdown": drawdown,
+            "sharpe": sharpe,
+            "returns": returns,
+            "trades": trades,
+            "sqn": sqn,
         }
 
         total_trades = int((trades.get("total", {}) or {}).get("closed", 0) or 0)
@@ -420,25 +767,14 @@ class BacktestService:
         win_rate = round((won_total / total_trades) if total_trades else 0.0, 3)
         gross_pnl = (trades.get("pnl", {}) or {}).get("gross", {}) or {}
         net_pnl = (trades.get("pnl", {}) or {}).get("net", {}) or {}
-        equity_curve = strategy.analyzers.equitycurve.get_analysis()
-        if not isinstance(equity_curve, list):
-            equity_curve = []
-        markers = getattr(strategy, "_markers", [])
-        if not isinstance(markers, list):
-            markers = []
-        if not markers:
-            markers = strategy.analyzers.trademarkers.get_analysis()
-            if not isinstance(markers, list):
-                markers = []
+        equity_curve = run["equity_curve"]
+        markers = run["markers"]
+        # Open entries (buy fills not yet matched by a sell), counted once here rather than by each reader.
+        net_position = max(sum(1 if m.get("side") == "buy" else -1 for m in markers), 0)
+        opens, highs, lows, closes = (arrays["columns"][col].tolist() for col in ("open", "high", "low", "close"))
         price_bars = [
-            {
-                "time": idx.isoformat(),
-                "open": float(row["open"]),
-                "high": float(row["high"]),
-                "low": float(row["low"]),
-                "close": float(row["close"]),
-            }
-            for idx, row in frame.iterrows()
+            {"time": t, "open": o, "high": h, "low": l, "close": c}
+            for t, o, h, l, c in zip(bar_times, opens, highs, lows, closes)
         ]
         indicator_specs = BacktestService._resolve_indicator_specs(strategy_module, params)
         indicator_series: dict[str, list[dict]] = {}
@@ -446,22 +782,38 @@ class BacktestService:
         indicator_colors: dict[str, str] = {}
         indicator_warnings: list[str] = []
 
-        for spec in indicator_specs:
-            iid = str(spec["id"])
-            try:
-                values = BacktestService._compute_indicator(frame, spec)
-            except Exception as exc:
-                indicator_warnings.append(f"{iid}: {exc}")
-                continue
+        # Reuse buffers the strategy already computed instead of re-running the same rolling window.
+        strategy_series = run["strategy_series"]
+        # Each source column is converted to float64 and hashed once, however many specs read it.
+        source_columns = arrays["columns"]
+        source_digests = arrays["digests"]
 
+        for spec in indicator_specs:
+            iid = spec.id
+            arr = strategy_series.get((spec.type, spec.source, spec.period))
+            if arr is None or len(arr) != len(frame):
+                source = spec.source
+                if source not in source_columns:
+                    if source not in frame.columns:
+                        indicator_warnings.append(f"{iid}: Indicator source column '{source}' not found")
+                        continue
+                    source_columns[source] = np.ascontiguousarray(frame[source].to_numpy(dtype=np.float64))
+                values = source_columns[source]
+                if source not in source_digests:
+                    source_digests[source] = hashlib.blake2b(values, digest_size=16, usedforsecurity=False).digest()
+                try:
+                    arr = BacktestService._cached_indicator(values, source_digests[source], spec)
+                except Exception as exc:
+                    indicator_warnings.append(f"{iid}: {exc}")
+                    continue
+
+            valid = np.flatnonzero(~np.isnan(arr))
             indicator_series[iid] = [
-                {"time": idx.isoformat(), "value": float(v)}
-                for idx, v in values.items()
-                if v == v
+                {"time": bar_times[i], "value": v} for i, v in zip(valid.tolist(), arr[valid].tolist())
             ]
-            indicator_labels[iid] = str(spec.get("label") or iid)
-            if str(spec.get("color") or "").strip():
-                indicator_colors[iid] = str(spec["color"]).strip()
+            indicator_labels[iid] = spec.label or iid
+            if spec.color:
+                indicator_colors[iid] = spec.color
 
         out = {
             "run_id": run_id,
@@ -473,6 +825,7 @@ class BacktestService:
             "price_bars": price_bars,
             "indicator_series": indicator_series,
             "markers": markers,
+            "net_position": net_position,
             "params": params,
             "bars": len(frame),
             "context": {
@@ -525,9 +878,114 @@ class BacktestService:
         }
 
         if persist:
-            (BACKTESTS_DIR / f"{run_id}.json").write_text(json.dumps(out), encoding="utf-8")
+            # Serializing large runs takes a while; the caller doesn't need to wait for the file.
+            _PERSIST_POOL.submit(_write_result, run_id, out)
         return out
 
     @classmethod
     def run_backtest(cls, payload: dict) -> dict:
         return cls._execute(payload, persist=True)
+
+    @staticmethod
+    def _prefetch_frames(payloads: list[dict]) -> list[pd.DataFrame | None]:
+        # Download yfinance symbols that share an interval and period in one batched request.
+        groups: dict[tuple[str, str], list[int]] = {}
+        for i, payload in enumerate(payloads):
+            if not payload.get("dataset_path"):
+                key = (payload.get("interval", "1m"), payload.get("period", "5d"))
+                groups.setdefault(key, []).append(i)
+        frames: list[pd.DataFrame | None] = [None] * len(payloads)
+        for (interval, period), indices in groups.items():
+            symbols = [payloads[i].get("symbol", "AAPL") for i in indices]
+            if len(set(symbols)) < 2:
+                continue
+            try:
+                fetched = MarketDataService.get_ohlcv_many(symbols, interval=interval, period=period)
+            except Exception:
+                # Each run then fetches on its own and reports its own error.
+                continue
+            for i, symbol in zip(indices, symbols):
+                frames[i] = fetched.get(symbol)
+        return frames
+
+    @classmethod
+    def run_many(
+        cls,
+        payloads: list[dict],
+        executor: Executor | None = None,
+        max_workers: int | None = None,
+    ) -> list[dict | Exception]:
+        # Results come back in payload order; a failed run yields its exception instead of a dict.
+        owned = executor is None
+        if owned:
+            executor = ProcessPoolExecutor(
+                max_workers=max(1, min(max_workers or CPU_WORKERS, len(payloads))),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        frames = cls._prefetch_frames(payloads)
+        try:
+            futures = {
+                executor.submit(cls._execute, payload, True, None, frames[i]): i for i, payload in enumerate(payloads)
+            }
+            results: list[dict | Exception] = [{} for _ in payloads]
+            for future in as_completed(futures):
+                exc = future.exception()
+                results[futures[future]] = exc if exc is not None else future.result()
+            return results
+        finally:
+            if owned:
+                executor.shutdown()
+
+    @staticmethod
+    def run_grid(
+        payload: dict,
+        grid: dict[str, list],
+        executor: Executor | None = None,
+        max_workers: int | None = None,
+    ) -> list[dict]:
+        if not grid:
+            raise ValueError("grid must define at least one parameter")
+        names = [str(name) for name in grid]
+        combos = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+        if not combos:
+            raise ValueError("Every grid parameter needs at least one value")
+        if len(combos) > BacktestService.MAX_GRID_POINTS:
+            raise ValueError(f"Grid has {len(combos)} points; the limit is {BacktestService.MAX_GRID_POINTS}")
+
+        frame = MarketDataService.get_ohlcv(payload)
+        workers = max(1, min(max_workers or CPU_WORKERS, len(combos)))
+        owned = executor is None
+        if owned:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            size = -(-len(combos) // workers)
+            futures = [
+                executor.submit(_run_grid_chunk, payload, frame, combos[start : start + size])
+                for start in range(0, len(combos), size)
+            ]
+            return [point for future in futures for point in future.result()]
+        finally:
+            if owned:
+                executor.shutdown()
+
+    @staticmethod
+    @contextmanager
+    def frame_pool(frame: pd.DataFrame, workers: int) -> Iterator[ProcessPoolExecutor]:
+        # Spill the columns to .npy files every worker memory-maps instead of unpickling its own copy.
+        columns = [str(col) for col in frame.columns]
+        shm_root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        with tempfile.TemporaryDirectory(prefix="bt_grid_", dir=shm_root) as shared_dir:
+            np.save(Path(shared_dir) / "values.npy", np.ascontiguousarray(frame.to_numpy(dtype=np.float64).T))
+            np.save(Path(shared_dir) / "index.npy", frame.index.to_numpy())
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_grid_worker,
+                initargs=(shared_dir, columns),
+            ) as pool:
+                yield pool
+
+    @staticmethod
+    def submit_frame_run(pool: Executor, payload: dict, params: dict) -> Future:
+        # Runs one parameter set against the frame a frame_pool worker holds.
+        return pool.submit(_run_grid_point, payload, params)
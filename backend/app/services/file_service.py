@@ -1,9 +1,38 @@
+import os
+from collections.abc import Iterator
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from app.core.config import STRATEGIES_DIR
+from app.services.strategy_loader import invalidate_strategy_module
+
+# Resolved once; every request-path check compares against this.
+_STRATEGIES_ROOT = STRATEGIES_DIR.resolve()
+
+
+@lru_cache(maxsize=128)
+def _read_text_cached(path: str, mtime_ns: int, size: int) -> str:
+    # mtime/size are part of the key only, so edits on disk miss the cache.
+    return Path(path).read_text(encoding="utf-8")
+
+
+def _walk_py_files(root: str) -> Iterator[os.DirEntry]:
+    # scandir hands back type info with each entry, so directories are told apart without a stat.
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk_py_files(entry.path)
+        elif entry.name.endswith(".py") and entry.is_file():
+            yield entry
 
 
 class FileService:
+    _list_cache: tuple[tuple[tuple[str, int], ...], list[dict]] | None = None
+
     DEFAULT_TEMPLATE = '''"""New strategy."""
 
 import backtrader as bt
@@ -48,36 +77,49 @@ def describe() -> dict:
     @staticmethod
     def _resolve_strategy_path(rel_path: str) -> Path:
         path = (STRATEGIES_DIR / rel_path).resolve()
-        if not str(path).startswith(str(STRATEGIES_DIR.resolve())):
+        if not path.is_relative_to(_STRATEGIES_ROOT):
             raise ValueError("Invalid path")
         return path
 
     @staticmethod
     def list_strategies() -> list[dict]:
+        root = str(STRATEGIES_DIR)
+        entries = sorted(
+            ((os.path.relpath(entry.path, root), entry.stat().st_mtime_ns) for entry in _walk_py_files(root)),
+            key=lambda item: item[0].split(os.sep),
+        )
+        fingerprint = tuple(entries)
+        cached = FileService._list_cache
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
         items: list[dict] = []
-        for path in sorted(STRATEGIES_DIR.rglob("*.py")):
-            stat = path.stat()
+        for rel_path, mtime_ns in entries:
             items.append(
                 {
-                    "name": path.name,
-                    "path": str(path.relative_to(STRATEGIES_DIR)),
-                    "updated_at": datetime.fromtimestamp(stat.st_mtime),
+                    "name": os.path.basename(rel_path),
+                    "path": rel_path,
+                    "updated_at": datetime.fromtimestamp(mtime_ns / 1e9),
                 }
             )
+        FileService._list_cache = (fingerprint, items)
         return items
 
     @staticmethod
     def read_strategy(rel_path: str) -> str:
         path = FileService._resolve_strategy_path(rel_path)
-        if not path.exists():
-            raise FileNotFoundError(rel_path)
-        return path.read_text(encoding="utf-8")
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(rel_path) from None
+        return _read_text_cached(str(path), stat.st_mtime_ns, stat.st_size)
 
     @staticmethod
     def save_strategy(rel_path: str, content: str) -> None:
         path = FileService._resolve_strategy_path(rel_path)
         path.parent.mkdir(parents=True, exist_ok=True)
         path.write_text(content, encoding="utf-8")
+        invalidate_strategy_module(rel_path)
 
     @staticmethod
     def create_strategy(rel_path: str = "new_strategy.py") -> str:
@@ -120,6 +162,8 @@ def describe() -> dict:
             raise ValueError("Target strategy file already exists")
         new_path.parent.mkdir(parents=True, exist_ok=True)
         old_path.rename(new_path)
+        invalidate_strategy_module(old_rel_path)
+        invalidate_strategy_module(new_rel_path)
 
     @staticmethod
     def delete_strategy(rel_path: str) -> None:
@@ -129,3 +173,4 @@ def describe() -> dict:
         if not path.exists():
             raise FileNotFoundError(rel_path)
         path.unlink()
+        invalidate_strategy_module(rel_path)
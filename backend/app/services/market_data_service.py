@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import os
+import re
+import threading
 from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_datetime64_dtype, is_numeric_dtype
 import requests
+from requests.adapters import HTTPAdapter
 import yfinance as yf
+from cachetools import TTLCache
 
-from app.core.config import DATASETS_DIR
+from app.core.config import DATASETS_DIR, ensure_dirs
+from app.core.singleflight import SingleFlight
 from app.services.alpaca_service import AlpacaService
 
 ALLOWED_INTERVALS = {"1m", "5m", "15m", "1h", "1d"}
+IMPORT_CHUNK_ROWS = 500_000
+_TICK_BIN_NS = {"1m": 60_000_000_000, "5m": 300_000_000_000}
+_ALPACA_BAR_FIELDS = itemgetter("t", "o", "h", "l", "c", "v")
 POPULAR_SYMBOLS = [
     {"symbol": "^GSPC", "name": "S&P 500", "type": "INDEX", "exchange": "INDEX"},
     {"symbol": "^NDX", "name": "NASDAQ 100", "type": "INDEX", "exchange": "INDEX"},
@@ -25,48 +38,86 @@ POPULAR_SYMBOLS = [
     {"symbol": "ETH-USD", "name": "Ethereum USD", "type": "CRYPTO", "exchange": "CCC"},
     {"symbol": "SOL-USD", "name": "Solana USD", "type": "CRYPTO", "exchange": "CCC"},
 ]
+_POPULAR_HAYSTACK = [
+    (f"{item.get('symbol', '')} {item.get('name', '')}".lower(), item) for item in POPULAR_SYMBOLS
+]
+
+# Characters that can appear in Yahoo tickers (^GSPC, ES=F, BTC-USD) or names (S&P).
+_SEARCH_JUNK_RE = re.compile(r"[^A-Za-z0-9.\-^=& ]")
+_SEARCH_CACHE: TTLCache = TTLCache(maxsize=2048, ttl=300)
+_SEARCH_CACHE_LOCK = threading.Lock()
+_SEARCH_FLIGHTS = SingleFlight()
+# Keep-alive session so repeated searches reuse the TLS connection to Yahoo.
+_SEARCH_SESSION = requests.Session()
+_SEARCH_SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+_SEARCH_SESSION.headers.update({"User-Agent": "Mozilla/5.0", "Accept": "application/json,text/plain,*/*"})
+
+# (symbol, interval, period) -> normalized yfinance download; short TTL so live windows keep moving.
+_OHLCV_CACHE: TTLCache = TTLCache(maxsize=32, ttl=60)
+_OHLCV_CACHE_LOCK = threading.Lock()
+_OHLCV_FLIGHTS = SingleFlight()
+
+# (path, st_mtime_ns, st_size) -> list_datasets entry; a rewritten CSV gets a new key.
+_DATASET_META_CACHE: dict[tuple[str, int, int], dict] = {}
+_DATASET_META_CACHE_SIZE = 512
+# Column layout of the CSVs import_dataset writes.
+_CANONICAL_COLUMNS = ["datetime", "open", "high", "low", "close", "volume"]
+_EDGE_READ_BYTES = 64 * 1024
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _parse_datetimes(values: pd.Series | pd.Index) -> pd.Series | pd.DatetimeIndex:
+    # yfinance frames already carry datetimes; only the timezone needs normalizing.
+    if isinstance(values.dtype, pd.DatetimeTZDtype) or is_datetime64_dtype(values.dtype):
+        stamps = values if isinstance(values, pd.Index) else values.dt
+        return stamps.tz_localize("UTC") if stamps.tz is None else stamps.tz_convert("UTC")
+    # ISO strings (CSV exports, Alpaca) go straight to pandas' ISO8601 parser instead of per-row inference.
+    head = (values[:5] if isinstance(values, pd.Index) else values.iloc[:5]).dropna()
+    iso = len(head) > 0 and all(isinstance(v, str) and _ISO_DATE_RE.match(v) for v in head)
+    return pd.to_datetime(values, utc=True, errors="coerce", cache=True, format="ISO8601" if iso else None)
 
 
 class MarketDataService:
     @staticmethod
     def _fallback_symbol_search(query: str, limit: int) -> list[dict]:
         q = query.lower().strip()
-        ranked: list[dict] = []
-        for item in POPULAR_SYMBOLS:
-            symbol = str(item.get("symbol", ""))
-            name = str(item.get("name", ""))
-            hay = f"{symbol} {name}".lower()
-            if q in hay:
-                ranked.append(item)
-        return ranked[:limit]
+        return [item for hay, item in _POPULAR_HAYSTACK if q in hay][:limit]
 
     @staticmethod
     def search_symbols(query: str, limit: int = 8) -> list[dict]:
-        q = (query or "").strip()
-        if len(q) < 1:
+        # Normalize before the cache so "aapl", " AAPL" and "AAPL!" share one entry.
+        q = " ".join(_SEARCH_JUNK_RE.sub("", query or "").split()).upper()[:32]
+        if not q:
             return []
         safe_limit = max(1, min(int(limit), 20))
 
+        key = (q, safe_limit)
+        with _SEARCH_CACHE_LOCK:
+            cached = _SEARCH_CACHE.get(key)
+        if cached is not None:
+            return cached
+        return _SEARCH_FLIGHTS.do(key, lambda: MarketDataService._search_symbols_uncached(q, safe_limit))
+
+    @staticmethod
+    def _search_symbols_uncached(q: str, safe_limit: int) -> list[dict]:
         out: list[dict] = []
         seen: set[str] = set()
+        remote_ok = False
 
         try:
-            response = requests.get(
+            response = _SEARCH_SESSION.get(
                 "https://query1.finance.yahoo.com/v1/finance/search",
                 params={
                     "q": q,
                     "quotesCount": safe_limit,
                     "newsCount": 0,
                 },
-                headers={
-                    "User-Agent": "Mozilla/5.0",
-                    "Accept": "application/json,text/plain,*/*",
-                },
                 timeout=8,
             )
             response.raise_for_status()
             payload = response.json() or {}
             quotes = payload.get("quotes", []) or []
+            remote_ok = True
 
             for item in quotes:
                 symbol = str(item.get("symbol") or "").strip()
@@ -82,60 +133,116 @@ class MarketDataService:
                     }
                 )
                 if len(out) >= safe_limit:
-                    return out
+                    break
         except requests.RequestException:
             pass
 
-        for item in MarketDataService._fallback_symbol_search(q, safe_limit):
-            symbol = str(item.get("symbol") or "").strip()
-            if not symbol or symbol in seen:
-                continue
-            seen.add(symbol)
-            out.append(item)
-            if len(out) >= safe_limit:
-                break
+        if len(out) < safe_limit:
+            for item in MarketDataService._fallback_symbol_search(q, safe_limit):
+                symbol = str(item.get("symbol") or "").strip()
+                if not symbol or symbol in seen:
+                    continue
+                seen.add(symbol)
+                out.append(item)
+                if len(out) >= safe_limit:
+                    break
 
+        if remote_ok:
+            # Provider outages fall back to the static list; don't pin that for the TTL.
+            with _SEARCH_CACHE_LOCK:
+                _SEARCH_CACHE[(q, safe_limit)] = out
         return out
 
+    @staticmethod
+    def _count_lines(path: Path) -> int:
+        lines = 0
+        last = b"\n"
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            while chunk := os.read(fd, 1 << 20):
+                lines += chunk.count(b"\n")
+                last = chunk[-1:]
+        finally:
+            os.close(fd)
+        # A final line without a trailing newline still counts, as it did when iterating the file.
+        return lines + (last != b"\n")
+
+    @staticmethod
+    def _edge_timestamps(path: Path, size: int) -> tuple[str, str] | None:
+        # Files this service writes are sorted by datetime, so the first and last rows bound the range.
+        with open(path, "rb") as fh:
+            head = fh.read(_EDGE_READ_BYTES)
+            fh.seek(max(0, size - _EDGE_READ_BYTES))
+            tail = fh.read(_EDGE_READ_BYTES)
+        head_lines = head.split(b"\n", 2)
+        tail_lines = tail.rstrip(b"\r\n").rsplit(b"\n", 1)
+        if len(head_lines) < 3 or len(tail_lines) < 2:
+            return None
+        try:
+            first = pd.Timestamp(head_lines[1].split(b",", 1)[0].decode().strip())
+            last = pd.Timestamp(tail_lines[1].split(b",", 1)[0].decode().strip())
+        except (ValueError, UnicodeDecodeError):
+            return None
+        if pd.isna(first) or pd.isna(last):
+            return None
+        return str(first), str(last)
+
     @staticmethod
     def list_datasets() -> list[dict]:
         items: list[dict] = []
         for path in sorted(DATASETS_DIR.glob("*.csv")):
-            try:
-                sample = pd.read_csv(path, nrows=5000)
-            except Exception:
+            stat = path.stat()
+            key = (str(path), stat.st_mtime_ns, stat.st_size)
+            cached = _DATASET_META_CACHE.get(key)
+            if cached is not None:
+                items.append(cached)
                 continue
 
             rows = None
             start = None
             end = None
-            for tcol in ("datetime", "timestamp", "time", "date"):
-                if tcol in sample.columns:
-                    ts = pd.to_datetime(sample[tcol], errors="coerce")
-                    ts = ts.dropna()
-                    if not ts.empty:
-                        start = str(ts.min())
-                        end = str(ts.max())
-                    break
+            try:
+                # Only the header and the time column are needed; skip parsing the price columns.
+                columns = pd.read_csv(path, nrows=0).columns
+                edges = None
+                if list(columns) == _CANONICAL_COLUMNS:
+                    edges = MarketDataService._edge_timestamps(path, stat.st_size)
+                if edges is not None:
+                    start, end = edges
+                    times = None
+                else:
+                    tcol = next((c for c in ("datetime", "timestamp", "time", "date") if c in columns), None)
+                    times = pd.read_csv(path, usecols=[tcol], nrows=5000)[tcol] if tcol is not None else None
+            except Exception:
+                continue
+
+            if times is not None:
+                ts = pd.to_datetime(times, errors="coerce")
+                ts = ts.dropna()
+                if not ts.empty:
+                    start = str(ts.min())
+                    end = str(ts.max())
 
             try:
-                rows = sum(1 for _ in open(path, "r", encoding="utf-8")) - 1
+                rows = MarketDataService._count_lines(path) - 1
             except Exception:
                 rows = None
 
-            stat = path.stat()
-            items.append(
-                {
-                    "name": path.name,
-                    "path": path.name,
-                    "size_bytes": stat.st_size,
-                    "updated_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
-                    "rows": rows,
-                    "start": start,
-                    "end": end,
-                    "columns": [str(c) for c in sample.columns],
-                }
-            )
+            item = {
+                "name": path.name,
+                "path": path.name,
+                "size_bytes": stat.st_size,
+                "updated_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+                "rows": rows,
+                "start": start,
+                "end": end,
+                "columns": [str(c) for c in columns],
+            }
+            if len(_DATASET_META_CACHE) >= _DATASET_META_CACHE_SIZE:
+                # Dicts keep insertion order, so this drops the oldest entry.
+                _DATASET_META_CACHE.pop(next(iter(_DATASET_META_CACHE)), None)
+            _DATASET_META_CACHE[key] = item
+            items.append(item)
         return items
 
     @staticmethod
@@ -151,16 +258,16 @@ class MarketDataService:
 
         index_name = str(frame.index.name or "").lower()
         if "date" in frame.columns:
-            frame["datetime"] = pd.to_datetime(frame["date"], utc=True, errors="coerce")
+            frame["datetime"] = _parse_datetimes(frame["date"])
             frame = frame.drop(columns=["date"])
         elif "datetime" in frame.columns:
-            frame["datetime"] = pd.to_datetime(frame["datetime"], utc=True, errors="coerce")
+            frame["datetime"] = _parse_datetimes(frame["datetime"])
         elif "timestamp" in frame.columns:
-            frame["datetime"] = pd.to_datetime(frame["timestamp"], utc=True, errors="coerce")
+            frame["datetime"] = _parse_datetimes(frame["timestamp"])
         elif "time" in frame.columns:
-            frame["datetime"] = pd.to_datetime(frame["time"], utc=True, errors="coerce")
+            frame["datetime"] = _parse_datetimes(frame["time"])
         elif index_name in {"date", "datetime", "timestamp", "time"}:
-            frame["datetime"] = pd.to_datetime(frame.index, utc=True, errors="coerce")
+            frame["datetime"] = _parse_datetimes(frame.index)
         else:
             raise ValueError("Could not determine datetime column")
 
@@ -174,8 +281,9 @@ class MarketDataService:
 
         clean = frame[["datetime", "open", "high", "low", "close", "volume"]].copy()
         clean = clean.dropna(subset=["datetime", "open", "high", "low", "close"])
-        clean = clean.sort_values("datetime").drop_duplicates(subset=["datetime"], keep="last")
+        # Dedupe and sort on the int64-backed index rather than hashing a datetime column.
         clean = clean.set_index("datetime")
+        clean = clean[~clean.index.duplicated(keep="last")].sort_index()
         clean.index = clean.index.tz_convert(None)
 
         for col in ["open", "high", "low", "close", "volume"]:
@@ -188,7 +296,12 @@ class MarketDataService:
 
     @staticmethod
     def _ticks_to_ohlcv(frame: pd.DataFrame, timeframe: str = "1m") -> pd.DataFrame:
-        if timeframe not in {"1m", "5m"}:
+        return MarketDataService._merge_tick_buckets([MarketDataService._tick_buckets(frame, timeframe)], timeframe)
+
+    @staticmethod
+    def _tick_buckets(frame: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        # Per-bar aggregates of one batch of ticks, plus first/last tick times so batches can be merged.
+        if timeframe not in _TICK_BIN_NS:
             raise ValueError("Tick resampling supports only 1m and 5m")
 
         lower_map = {c: str(c).strip().lower() for c in frame.columns}
@@ -197,20 +310,50 @@ class MarketDataService:
             raise ValueError("Tick CSV needs timestamp or time column")
 
         tcol = "timestamp" if "timestamp" in frame.columns else "time"
-        frame["datetime"] = pd.to_datetime(frame[tcol], utc=True, errors="coerce")
+        frame["datetime"] = _parse_datetimes(frame[tcol])
         if "price" not in frame.columns:
             raise ValueError("Tick CSV needs price column")
         if "size" not in frame.columns:
             frame["size"] = 1
 
-        ticks = frame[["datetime", "price", "size"]].dropna(subset=["datetime", "price"]).copy()
-        ticks = ticks.sort_values("datetime").set_index("datetime")
+        ticks = frame[["datetime", "price", "size"]].dropna(subset=["datetime", "price"])
+        ticks = ticks.sort_values("datetime", kind="stable")
+
+        # Bucket on integer nanoseconds: one groupby pass, and empty bins never get materialized.
+        stamps = pd.DatetimeIndex(ticks["datetime"]).as_unit("ns").asi8
+        key = stamps // _TICK_BIN_NS[timeframe]
+        price = ticks["price"].groupby(key, sort=False)
+        when = pd.Series(stamps).groupby(key, sort=False)
+        return pd.DataFrame(
+            {
+                "open": price.first(),
+                "high": price.max(),
+                "low": price.min(),
+                "close": price.last(),
+                "volume": ticks["size"].groupby(key, sort=False).sum(),
+                "first_ns": when.min(),
+                "last_ns": when.max(),
+            }
+        )
 
-        rule = "1min" if timeframe == "1m" else "5min"
-        ohlc = ticks["price"].resample(rule).ohlc()
-        vol = ticks["size"].resample(rule).sum().rename("volume")
-        out = pd.concat([ohlc, vol], axis=1).dropna(subset=["open", "high", "low", "close"])
-        out.index = out.index.tz_convert(None)
+    @staticmethod
+    def _merge_tick_buckets(parts: list[pd.DataFrame], timeframe: str) -> pd.DataFrame:
+        buckets = pd.concat(parts) if parts else pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
+        if len(parts) > 1:
+            # A bar can straddle two batches: open comes from its earliest tick, close from its latest.
+            merged = buckets.groupby(level=0)
+            buckets = pd.DataFrame(
+                {
+                    "open": buckets.sort_values("first_ns", kind="stable").groupby(level=0)["open"].first(),
+                    "high": merged["high"].max(),
+                    "low": merged["low"].min(),
+                    "close": buckets.sort_values("last_ns", kind="stable").groupby(level=0)["close"].last(),
+                    "volume": merged["volume"].sum(),
+                }
+            )
+        out = buckets[["open", "high", "low", "close", "volume"]].sort_index()
+        bin_ns = _TICK_BIN_NS[timeframe]
+        out.index = pd.DatetimeIndex(pd.to_datetime(out.index.to_numpy(dtype=np.int64) * bin_ns, unit="ns"), name="datetime")
         if out.empty:
             raise ValueError("Tick conversion produced no bars")
         return out
@@ -222,8 +365,38 @@ class MarketDataService:
             src = (DATASETS_DIR / dataset_path).resolve()
         if not src.exists():
             raise FileNotFoundError(str(src))
+        stat = src.stat()
+        # Callers only add or replace columns, so a shallow copy keeps the cached frame intact.
+        return MarketDataService._load_dataset_cached(str(src), stat.st_mtime_ns, stat.st_size).copy(deep=False)
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _load_dataset_cached(src: str, mtime_ns: int, size: int) -> pd.DataFrame:
+        # mtime and size are only part of the key, so a rewritten file misses the cache.
         frame = pd.read_csv(src)
-        return MarketDataService._normalize_ohlcv(frame)
+        canonical = MarketDataService._canonical_ohlcv(frame)
+        return canonical if canonical is not None else MarketDataService._normalize_ohlcv(frame)
+
+    @staticmethod
+    def _canonical_ohlcv(frame: pd.DataFrame) -> pd.DataFrame | None:
+        # CSVs written by import_dataset are already clean; verify cheaply instead of renormalizing.
+        if frame.empty or list(frame.columns) != _CANONICAL_COLUMNS:
+            return None
+        values = frame[_CANONICAL_COLUMNS[1:]]
+        if not all(is_numeric_dtype(dtype) for dtype in values.dtypes):
+            return None
+        if values[["open", "high", "low", "close"]].isna().to_numpy().any():
+            return None
+        first = frame["datetime"].iloc[0]
+        if not isinstance(first, str) or not _ISO_DATE_RE.match(first):
+            return None
+        stamps = pd.DatetimeIndex(
+            pd.to_datetime(frame["datetime"], utc=True, errors="coerce", cache=True, format="ISO8601"),
+            name="datetime",
+        )
+        if stamps.hasnans or not stamps.is_monotonic_increasing or not stamps.is_unique:
+            return None
+        return values.set_axis(stamps.tz_convert(None), axis=0)
 
     @staticmethod
     def get_ohlcv(payload: dict) -> pd.DataFrame:
@@ -237,14 +410,60 @@ class MarketDataService:
 
         symbol = payload.get("symbol", "AAPL")
         period = payload.get("period", "5d")
+        key = (symbol, interval, period)
+        with _OHLCV_CACHE_LOCK:
+            cached = _OHLCV_CACHE.get(key)
+        if cached is None:
+            # Optimizations and paper-session polls ask for the same window over and over.
+            cached = _OHLCV_FLIGHTS.do(key, lambda: MarketDataService._download_ohlcv(symbol, interval, period))
+        # Callers only add or replace columns, so a shallow copy keeps the cached frame intact.
+        return cached.copy(deep=False)
+
+    @staticmethod
+    def _download_ohlcv(symbol: str, interval: str, period: str) -> pd.DataFrame:
         frame = yf.download(symbol, interval=interval, period=period, auto_adjust=True)
-        return MarketDataService._normalize_ohlcv(frame)
+        clean = MarketDataService._normalize_ohlcv(frame)
+        MarketDataService._remember_ohlcv(symbol, interval, period, clean)
+        return clean
+
+    @staticmethod
+    def _remember_ohlcv(symbol: str, interval: str, period: str, frame: pd.DataFrame) -> None:
+        with _OHLCV_CACHE_LOCK:
+            _OHLCV_CACHE[(symbol, interval, period)] = frame
+
+    @staticmethod
+    def get_ohlcv_many(symbols: list[str], interval: str = "1m", period: str = "5d") -> dict[str, pd.DataFrame]:
+        # One threaded yfinance call for all symbols; symbols that come back empty are left out.
+        if interval not in ALLOWED_INTERVALS:
+            raise ValueError("Supported intervals: 1m, 5m, 15m, 1h, 1d")
+        unique = list(dict.fromkeys(symbols))
+        if not unique:
+            return {}
+        frame = yf.download(
+            " ".join(unique),
+            interval=interval,
+            period=period,
+            auto_adjust=True,
+            group_by="ticker",
+            threads=True,
+        )
+        out: dict[str, pd.DataFrame] = {}
+        returned = set(frame.columns.get_level_values(0)) if isinstance(frame.columns, pd.MultiIndex) else set()
+        for symbol in unique:
+            if symbol not in returned:
+                continue
+            try:
+                out[symbol] = MarketDataService._normalize_ohlcv(frame[symbol].copy())
+            except ValueError:
+                continue
+        return out
 
     @staticmethod
     def import_dataset(payload: dict) -> dict:
         source = payload.get("source", "").lower()
         timeframe = payload.get("timeframe") or payload.get("interval") or "1m"
         stamp = int(datetime.utcnow().timestamp())
+        ensure_dirs()
 
         if source == "yfinance":
             symbol = payload.get("symbol") or "AAPL"
@@ -252,6 +471,9 @@ class MarketDataService:
             period = payload.get("period") or "5d"
             frame = yf.download(symbol, interval=interval, period=period, auto_adjust=True)
             clean = MarketDataService._normalize_ohlcv(frame)
+            if interval in ALLOWED_INTERVALS:
+                # Fresh bars: later backtests on this window shouldn't see an older cached download.
+                MarketDataService._remember_ohlcv(symbol, interval, period, clean)
             name = f"{symbol}_{interval}_{period}_{stamp}.csv"
             target = DATASETS_DIR / name
             clean.reset_index().to_csv(target, index=False)
@@ -261,8 +483,19 @@ class MarketDataService:
             csv_path = payload.get("csv_path")
             if not csv_path:
                 raise ValueError("csv_path is required for source=csv")
-            frame = pd.read_csv(Path(csv_path).expanduser().resolve())
-            clean = MarketDataService._normalize_ohlcv(frame)
+            # Normalize in chunks so peak memory is one raw chunk plus the compact numeric result.
+            parts: list[pd.DataFrame] = []
+            error: ValueError | None = None
+            for chunk in pd.read_csv(Path(csv_path).expanduser().resolve(), chunksize=IMPORT_CHUNK_ROWS):
+                try:
+                    parts.append(MarketDataService._normalize_ohlcv(chunk))
+                except ValueError as exc:
+                    error = exc
+            if not parts:
+                raise error or ValueError("Dataset is empty")
+            clean = pd.concat(parts) if len(parts) > 1 else parts[0]
+            if len(parts) > 1:
+                clean = clean[~clean.index.duplicated(keep="last")].sort_index()
             name = f"ohlcv_import_{stamp}.csv"
             target = DATASETS_DIR / name
             clean.reset_index().to_csv(target, index=False)
@@ -272,12 +505,15 @@ class MarketDataService:
             csv_path = payload.get("csv_path")
             if not csv_path:
                 raise ValueError("csv_path is required for source=csv_tick")
-            frame = pd.read_csv(Path(csv_path).expanduser().resolve())
             ticks_name = f"ticks_raw_{stamp}.csv"
             ticks_target = DATASETS_DIR / ticks_name
-            frame.to_csv(ticks_target, index=False)
-
-            bars = MarketDataService._ticks_to_ohlcv(frame, timeframe=timeframe)
+            # Copy and aggregate the ticks chunk by chunk; only per-bar partials stay in memory.
+            parts = []
+            reader = pd.read_csv(Path(csv_path).expanduser().resolve(), chunksize=IMPORT_CHUNK_ROWS)
+            for i, chunk in enumerate(reader):
+                chunk.to_csv(ticks_target, index=False, mode="a" if i else "w", header=not i)
+                parts.append(MarketDataService._tick_buckets(chunk, timeframe))
+            bars = MarketDataService._merge_tick_buckets(parts, timeframe)
             bars_name = f"ticks_to_{timeframe}_{stamp}.csv"
             bars_target = DATASETS_DIR / bars_name
             bars.reset_index().to_csv(bars_target, index=False)
@@ -296,7 +532,8 @@ class MarketDataService:
             if interval not in {"1m", "5m"}:
                 raise ValueError("Alpaca import supports 1m/5m in v2")
 
-            now = datetime.utcnow()
+            # Minute-aligned so concurrent imports share one download; a window ending now is never cached.
+            now = datetime.utcnow().replace(second=0, microsecond=0)
             start = now - timedelta(days=5)
             tf = "1Min" if interval == "1m" else "5Min"
             response = AlpacaService.fetch_bars(symbol=symbol, timeframe=tf, start=start, end=now)
@@ -304,15 +541,9 @@ class MarketDataService:
             if not bars:
                 raise ValueError("No bars returned from Alpaca")
 
+            # One pass over the bar dicts, then transpose the tuples into columns.
             frame = pd.DataFrame(
-                {
-                    "datetime": [bar["t"] for bar in bars],
-                    "open": [bar["o"] for bar in bars],
-                    "high": [bar["h"] for bar in bars],
-                    "low": [bar["l"] for bar in bars],
-                    "close": [bar["c"] for bar in bars],
-                    "volume": [bar["v"] for bar in bars],
-                }
+                dict(zip(("datetime", "open", "high", "low", "close", "volume"), zip(*map(_ALPACA_BAR_FIELDS, bars))))
             )
             clean = MarketDataService._normalize_ohlcv(frame)
             name = f"alpaca_{symbol}_{interval}_{stamp}.csv"
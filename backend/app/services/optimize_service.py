@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import hashlib
+import importlib.util
 import math
-from numbers import Integral, Real
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from pathlib import Path
 import optuna
+import orjson
+import pandas as pd
 from optuna.trial import TrialState
-from optuna.samplers import TPESampler
+from optuna.samplers import CmaEsSampler, QMCSampler, TPESampler
 
+from app.core.config import CPU_WORKERS, OPTUNA_DB_PATH, ensure_dirs
 from app.services.backtest_service import BacktestService
 from app.services.market_data_service import MarketDataService
+from app.services.strategy_loader import load_strategy_module, load_strategy_params
 
 
 class OptimizeService:
@@ -15,6 +22,9 @@ class OptimizeService:
     MIN_TRAIN_BARS = 200
     MIN_OOS_BARS = 50
     SUPPORTED_OBJECTIVES = {"pnl", "final_value", "win_rate", "sharpe_ratio", "max_drawdown_pct"}
+    PRUNABLE_OBJECTIVES = {"pnl", "final_value"}
+    MEMO_SIZE = 4096
+    SAMPLER_PACKAGES = {"cmaes": "cmaes", "qmc": "scipy"}
 
     @staticmethod
     def _build_param_specs(payload: dict, ranges: dict) -> list[dict]:
@@ -56,12 +66,66 @@ class OptimizeService:
             if min_v > max_v:
                 raise ValueError(f"Invalid range for {name}: min must be <= max")
 
-            specs.append({"name": name, "type": param_type, "min": min_v, "max": max_v})
+            specs.append(
+                {
+                    "name": name,
+                    "type": param_type,
+                    "min": min_v,
+                    "max": max_v,
+                    "default": numeric_params[name].get("default"),
+                }
+            )
 
         if not specs:
             raise ValueError("No optimization parameters configured")
         return specs
 
+    @staticmethod
+    def _slow_period_max(param_specs: list[dict]) -> int | None:
+        # SMA-cross style strategies need slow_period > fast_period; sample only that region.
+        specs = {spec["name"]: spec for spec in param_specs}
+        fast, slow = specs.get("fast_period"), specs.get("slow_period")
+        if fast is None or slow is None or fast["type"] != "int" or slow["type"] != "int":
+            return None
+        return int(slow["max"])
+
+    @staticmethod
+    def _baseline_params(payload: dict, param_specs: list[dict]) -> dict[str, float | int]:
+        # Same precedence as a plain backtest: request params, then the module's PARAMS, then class defaults.
+        configured = load_strategy_params(str(payload["strategy_path"]))
+        configured.update(payload.get("params") or {})
+        baseline: dict[str, float | int] = {}
+        for spec in param_specs:
+            try:
+                value = float(configured.get(spec["name"], spec["default"]))
+            except (TypeError, ValueError):
+                continue
+            if not math.isfinite(value):
+                continue
+            value = min(max(value, spec["min"]), spec["max"])
+            baseline[spec["name"]] = int(value) if spec["type"] == "int" else value
+        return baseline
+
+    @staticmethod
+    def _study_name(
+        payload: dict, objective: str, split_pct: float, param_specs: list[dict], frame: pd.DataFrame
+    ) -> str:
+        strategy_path = str(payload["strategy_path"])
+        source = Path(load_strategy_module(strategy_path).__file__).read_bytes()
+        identity = {
+            "strategy": hashlib.blake2b(source, digest_size=16).hexdigest(),
+            "data": payload.get("dataset_path") or [payload.get("symbol", "AAPL"), payload.get("period", "5d")],
+            "interval": payload.get("interval", "1m"),
+            "window": [str(frame.index[0]), str(frame.index[-1]), len(frame)],
+            "objective": objective,
+            "split_pct": split_pct,
+            "start_cash": payload.get("start_cash"),
+            "params": payload.get("params"),
+            "space": [[spec["name"], spec["type"], spec["min"], spec["max"]] for spec in param_specs],
+        }
+        digest = hashlib.blake2b(orjson.dumps(identity, option=orjson.OPT_SORT_KEYS), digest_size=12).hexdigest()
+        return f"{strategy_path}:{digest}"
+
     @staticmethod
     def _objective_value(result: dict, objective: str) -> float:
         if objective == "pnl":
@@ -76,6 +140,20 @@ class OptimizeService:
             return float(((result.get("analytics", {}) or {}).get("risk", {}) or {}).get("max_drawdown_pct", 0.0))
         raise ValueError(f"Unsupported optimization objective '{objective}'")
 
+    @staticmethod
+    def _build_sampler(name: str, seed: int | None) -> optuna.samplers.BaseSampler:
+        if name == "tpe":
+            return TPESampler(seed=seed)
+        if name not in OptimizeService.SAMPLER_PACKAGES:
+            raise ValueError("Unsupported sampler. Use one of: tpe, cmaes, qmc")
+        # Optuna imports these samplers' backends lazily; fail fast with a 400 instead of mid-study.
+        package = OptimizeService.SAMPLER_PACKAGES[name]
+        if importlib.util.find_spec(package) is None:
+            raise ValueError(f"Sampler '{name}' needs the '{package}' package, which is not installed")
+        if name == "cmaes":
+            return CmaEsSampler(seed=seed, n_startup_trials=5)
+        return QMCSampler(seed=seed)
+
     @staticmethod
     def run_optimization(payload: dict) -> dict:
         try:
@@ -105,12 +183,22 @@ class OptimizeService:
                 seed = int(raw_seed)
             except (TypeError, ValueError) as exc:
                 raise ValueError("seed must be an integer or null") from exc
-        sampler = TPESampler(seed=seed) if seed is not None else TPESampler()
+        sampler_name = str(payload.get("sampler") or "tpe").strip().lower()
+        sampler = OptimizeService._build_sampler(sampler_name, seed)
+        try:
+            n_jobs = int(payload.get("n_jobs") or 1)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("n_jobs must be an integer; use -1 for all CPU workers") from exc
+        if n_jobs == -1:
+            n_jobs = CPU_WORKERS
+        if n_jobs < 1:
+            raise ValueError("n_jobs must be >= 1, or -1 for all CPU workers")
+        n_jobs = min(n_jobs, CPU_WORKERS, n_trials)
         param_specs = OptimizeService._build_param_specs(payload, ranges)
 
         frame_full = MarketDataService.get_ohlcv(payload)
         if len(frame_full) > OptimizeService.MAX_OPT_BARS:
-            frame_full = frame_full.tail(OptimizeService.MAX_OPT_BARS).copy()
+            frame_full = frame_full.tail(OptimizeService.MAX_OPT_BARS)
         total_bars = int(len(frame_full))
         if total_bars < (OptimizeService.MIN_TRAIN_BARS + OptimizeService.MIN_OOS_BARS):
             raise ValueError(
@@ -133,33 +221,128 @@ class OptimizeService:
             )
         train_end_raw = frame_full.index[train_end_idx]
         train_end_time = train_end_raw.isoformat() if hasattr(train_end_raw, "isoformat") else str(train_end_raw)
-        frame = frame_full.iloc[:train_bars].copy()
+        # Trials only read the frame, so slice without copying and derive its arrays once for all of them.
+        frame = frame_full.iloc[:train_bars]
+        arrays = BacktestService._prepare_frame(frame)
         failed_trials = 0
+        start_cash = float(payload.get("start_cash", 10000.0))
+        # Running portfolio value only tracks these objectives; the others can't be judged mid-run.
+        prunable = n_jobs == 1 and objective_name in OptimizeService.PRUNABLE_OBJECTIVES
+        # TPE often proposes an integer point it already tried; the train frame is fixed, so the value is too.
+        memo: dict[tuple, float] = {}
+
+        def remember(key: tuple, value: float) -> float:
+            if len(memo) >= OptimizeService.MEMO_SIZE:
+                memo.pop(next(iter(memo)))
+            memo[key] = value
+            return value
+
+        slow_max = OptimizeService._slow_period_max(param_specs)
+        # fast_period must be suggested before slow_period so the slow range can depend on it.
+        suggest_order = sorted(param_specs, key=lambda spec: spec["name"] == "slow_period")
+
+        def suggest(trial: optuna.Trial) -> dict[str, float | int]:
+            params: dict[str, float | int] = {}
+            for spec in suggest_order:
+                if spec["type"] == "int":
+                    low, high = int(spec["min"]), int(spec["max"])
+                    if slow_max is not None and spec["name"] == "fast_period":
+                        # Leave room for a slower period above it.
+                        high = max(low, min(high, slow_max - 1))
+                    elif slow_max is not None and spec["name"] == "slow_period":
+                        # fast_period is suggested first, so only slow > fast is ever sampled.
+                        low = min(high, max(low, int(params["fast_period"]) + 1))
+                    params[spec["name"]] = trial.suggest_int(spec["name"], low, high)
+                else:
+                    params[spec["name"]] = trial.suggest_float(spec["name"], float(spec["min"]), float(spec["max"]))
+            return params
 
         def objective(trial: optuna.Trial) -> float:
             nonlocal failed_trials
-            try:
-                params: dict[str, float | int] = {}
-                for spec in param_specs:
-                    if spec["type"] == "int":
-                        params[spec["name"]] = trial.suggest_int(spec["name"], int(spec["min"]), int(spec["max"]))
-                    else:
-                        params[spec["name"]] = trial.suggest_float(spec["name"], float(spec["min"]), float(spec["max"]))
 
+            def report(bars: int, value: float) -> None:
+                trial.report(value - start_cash if objective_name == "pnl" else value, bars)
+                if trial.should_prune():
+                    raise optuna.TrialPruned(f"Pruned after {bars} bars")
+
+            try:
+                params = suggest(trial)
+                key = tuple(sorted(params.items()))
+                if key in memo:
+                    return memo[key]
                 result = BacktestService._execute(
                     payload,
                     persist=False,
                     params_override=params,
                     frame_override=frame,
+                    arrays_override=arrays,
+                    progress=report if prunable else None,
                 )
-                return OptimizeService._objective_value(result, objective_name)
+                return remember(key, OptimizeService._objective_value(result, objective_name))
+            except optuna.TrialPruned:
+                raise
             except Exception:
                 failed_trials += 1
                 raise optuna.TrialPruned("Trial failed while executing backtest")
 
-        study = optuna.create_study(direction=direction, sampler=sampler)
+        pruner = (
+            optuna.pruners.HyperbandPruner(
+                min_resource=BacktestService.PROGRESS_BARS, max_resource=train_bars, reduction_factor=3
+            )
+            if prunable
+            else optuna.pruners.NopPruner()
+        )
+        resume = bool(payload.get("resume", True))
+        if resume:
+            ensure_dirs()
+        study = optuna.create_study(
+            direction=direction,
+            sampler=sampler,
+            pruner=pruner,
+            # Identical runs (same strategy source, data window and search space) continue one stored study.
+            storage=f"sqlite:///{OPTUNA_DB_PATH}" if resume else None,
+            study_name=OptimizeService._study_name(payload, objective_name, split_pct, param_specs, frame)
+            if resume
+            else None,
+            load_if_exists=True,
+        )
+        prior_trials = len(study.trials)
+        prior_pruned = len(study.get_trials(deepcopy=False, states=(TrialState.PRUNED,)))
+        for past in study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,)):
+            memo[tuple(sorted(past.params.items()))] = past.value
+        # Evaluate the strategy's current configuration first, so the result is never worse than it.
+        baseline = OptimizeService._baseline_params(payload, param_specs)
+        if baseline and not prior_trials:
+            study.enqueue_trial(baseline)
         try:
-            study.optimize(objective, n_trials=n_trials)
+            if n_jobs > 1:
+                # Backtests hold the GIL, so trials run in worker processes; the sampler stays here (ask/tell).
+                with BacktestService.frame_pool(frame, n_jobs) as pool:
+                    running: dict[Future, tuple[optuna.Trial, tuple]] = {}
+                    asked = 0
+                    while asked < n_trials or running:
+                        while asked < n_trials and len(running) < n_jobs:
+                            trial = study.ask()
+                            params = suggest(trial)
+                            asked += 1
+                            key = tuple(sorted(params.items()))
+                            if key in memo:
+                                study.tell(trial, memo[key])
+                                continue
+                            running[BacktestService.submit_frame_run(pool, payload, params)] = (trial, key)
+                        if not running:
+                            continue
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            trial, key = running.pop(future)
+                            try:
+                                value = OptimizeService._objective_value(future.result(), objective_name)
+                                study.tell(trial, remember(key, value))
+                            except Exception:
+                                failed_trials += 1
+                                study.tell(trial, state=TrialState.PRUNED)
+            else:
+                study.optimize(objective, n_trials=n_trials)
         except Exception as exc:
             raise ValueError(f"Optimization run failed before completion: {exc}") from exc
 
@@ -167,29 +350,20 @@ class OptimizeService:
         if not completed:
             raise ValueError("No successful optimization trial was completed.")
 
+        # Values are already native ints/floats; study.best_params deep-copies the best trial on each access.
+        best_params: dict[str, int | float] = dict(study.best_params)
         best: dict | None = None
         try:
             best = BacktestService._execute(
                 payload,
                 persist=False,
-                params_override=study.best_params,
+                params_override=best_params,
                 frame_override=frame,
+                arrays_override=arrays,
             )
         except Exception:
             best = None
 
-        best_params: dict[str, int | float] = {}
-        for key, value in study.best_params.items():
-            name = str(key)
-            if isinstance(value, bool):
-                best_params[name] = int(value)
-            elif isinstance(value, Integral):
-                best_params[name] = int(value)
-            elif isinstance(value, Real):
-                best_params[name] = float(value)
-            else:
-                best_params[name] = float(value)
-
         best_final_value = float(best.get("final_value", 0.0)) if isinstance(best, dict) else 0.0
         best_pnl = float(best.get("pnl", 0.0)) if isinstance(best, dict) else 0.0
         best_win_rate = float(best.get("win_rate", 0.0)) if isinstance(best, dict) else 0.0
@@ -200,9 +374,15 @@ class OptimizeService:
             "best_params": best_params,
             "trials": int(n_trials),
             "failed_trials": int(failed_trials),
+            "pruned_trials": len(study.get_trials(deepcopy=False, states=(TrialState.PRUNED,)))
+            - prior_pruned
+            - int(failed_trials),
+            "resumed_trials": int(prior_trials),
+            "total_trials": len(study.trials),
             "objective": objective_name,
             "direction": direction,
             "seed": int(seed) if seed is not None else None,
+            "sampler": sampler_name,
             "search_space": {spec["name"]: {"min": spec["min"], "max": spec["max"], "type": spec["type"]} for spec in param_specs},
             "best_metrics": {
                 "final_value": best_final_value,
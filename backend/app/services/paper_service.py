@@ -1,12 +1,22 @@
+import threading
 from datetime import datetime
 from uuid import uuid4
 
+import requests
+from cachetools import TTLCache
+
+from app.core.config import PAPER_SESSION_TTL
 from app.services.alpaca_service import AlpacaService
 from app.services.backtest_service import BacktestService
+from app.services.market_data_service import MarketDataService
+from app.services.strategy_loader import load_strategy_module
 
 
 class PaperService:
-    _sessions: dict[str, dict] = {}
+    # Sessions idle for longer than the TTL are dropped, along with their snapshots.
+    _sessions: TTLCache = TTLCache(maxsize=1024, ttl=PAPER_SESSION_TTL)
+    _snapshots: TTLCache = TTLCache(maxsize=1024, ttl=PAPER_SESSION_TTL)
+    _lock = threading.RLock()
 
     @classmethod
     def start_session(cls, payload: dict) -> dict:
@@ -29,29 +39,53 @@ class PaperService:
         }
 
         if broker == "alpaca":
-            account = AlpacaService.get_account()
-            session["alpaca_account"] = {
-                "id": account.get("id"),
-                "status": account.get("status"),
-                "buying_power": account.get("buying_power"),
-                "currency": account.get("currency"),
-            }
+            # Fail fast on missing credentials; the account itself is filled in by fetch_account.
+            AlpacaService._credentials()
+            session["alpaca_account"] = None
+            session["status"] = "pending"
             session["mode"] = "paper_remote"
         else:
             session["mode"] = "paper_local"
 
-        cls._sessions[session_id] = session
+        with cls._lock:
+            cls._sessions[session_id] = session
         return session
 
+    @classmethod
+    def fetch_account(cls, session_id: str) -> None:
+        with cls._lock:
+            session = cls._sessions.get(session_id)
+        if session is None:
+            return
+        try:
+            account = AlpacaService.get_account()
+        except (ValueError, requests.RequestException) as exc:
+            session["status"] = "error"
+            session["error"] = f"Broker error: {exc}"
+            return
+        session["alpaca_account"] = {
+            "id": account.get("id"),
+            "status": account.get("status"),
+            "buying_power": account.get("buying_power"),
+            "currency": account.get("currency"),
+        }
+        session["status"] = "running"
+
     @classmethod
     def list_sessions(cls) -> list[dict]:
-        return list(cls._sessions.values())
+        with cls._lock:
+            cls._sessions.expire()
+            cls._snapshots.expire()
+            return list(cls._sessions.values())
 
     @classmethod
     def get_session_state(cls, session_id: str) -> dict:
-        session = cls._sessions.get(session_id)
-        if not session:
-            raise ValueError("Paper session not found")
+        with cls._lock:
+            session = cls._sessions.get(session_id)
+            if not session:
+                raise ValueError("Paper session not found or expired")
+            # Polling keeps a session alive: re-inserting restarts its TTL.
+            cls._sessions[session_id] = session
 
         payload = {
             "strategy_path": session["strategy_path"],
@@ -63,11 +97,22 @@ class PaperService:
             "exchange": session.get("exchange"),
             "start_cash": session.get("cash", 10000.0),
         }
-        snapshot = BacktestService._execute(payload, persist=False)
+        # Backtrader can't resume a finished run, so reuse the last snapshot until new bars,
+        # a revised last bar or a strategy edit would change it.
+        frame = MarketDataService.get_ohlcv(payload)
+        module = load_strategy_module(session["strategy_path"])
+        last_bar = (frame.index[-1], float(frame["close"].iat[-1])) if len(frame) else None
+        key = (module, len(frame), last_bar)
+        with cls._lock:
+            cached = cls._snapshots.get(session_id)
+        if cached is not None and cached[0] == key:
+            snapshot = cached[1]
+        else:
+            snapshot = BacktestService._execute(payload, persist=False, frame_override=frame)
+            with cls._lock:
+                cls._snapshots[session_id] = (key, snapshot)
 
-        buys = len([m for m in snapshot.get("markers", []) if m.get("side") == "buy"])
-        sells = len([m for m in snapshot.get("markers", []) if m.get("side") == "sell"])
-        session["position"] = max(buys - sells, 0)
+        session["position"] = snapshot["net_position"]
         session["updated_at"] = datetime.utcnow().isoformat()
 
         return {
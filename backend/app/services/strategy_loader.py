@@ -6,10 +6,15 @@ from pathlib import Path
 from types import ModuleType
 from app.core.config import STRATEGIES_DIR
 
+_STRATEGIES_ROOT = STRATEGIES_DIR.resolve()
+
+# Resolved path -> ((st_mtime_ns, st_size), module); an edit on disk changes the stamp.
+_MODULE_CACHE: dict[str, tuple[tuple[int, int], ModuleType]] = {}
+
 
 def _resolve_strategy_path(rel_path: str) -> Path:
     path = (STRATEGIES_DIR / rel_path).resolve()
-    if not str(path).startswith(str(STRATEGIES_DIR.resolve())):
+    if not path.is_relative_to(_STRATEGIES_ROOT):
         raise ValueError("Invalid strategy path")
     if not path.exists():
         raise FileNotFoundError(rel_path)
@@ -18,6 +23,12 @@ def _resolve_strategy_path(rel_path: str) -> Path:
 
 def load_strategy_module(rel_path: str) -> ModuleType:
     path = _resolve_strategy_path(rel_path)
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _MODULE_CACHE.get(str(path))
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
     module_name = path.stem
     spec = importlib.util.spec_from_file_location(module_name, path)
     if not spec or not spec.loader:
@@ -26,12 +37,22 @@ def load_strategy_module(rel_path: str) -> ModuleType:
     # Backtrader expects strategy modules to be discoverable via sys.modules.
     sys.modules[module_name] = module
     spec.loader.exec_module(module)
+    _MODULE_CACHE[str(path)] = (stamp, module)
     return module
 
 
+def invalidate_strategy_module(rel_path: str) -> None:
+    # Only clears this process's cache: cpu_pool workers still rely on the (mtime_ns, size) stamp alone.
+    _MODULE_CACHE.pop(str((STRATEGIES_DIR / rel_path).resolve()), None)
+
+
 def load_strategy_params(rel_path: str) -> dict:
-    module = load_strategy_module(rel_path)
+    return module_params(load_strategy_module(rel_path))
+
+
+def module_params(module: ModuleType) -> dict:
     params = getattr(module, "PARAMS", {})
     if not isinstance(params, dict):
         raise ValueError("PARAMS in strategy must be a dict")
-    return params
+    # The module is cached, so hand out a copy callers can update freely.
+    return dict(params)
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Mirrors Backtrader's defaults for the analyzers BacktestService attaches.
+TRADING_DAYS_PER_YEAR = 252
+SHARPE_RISK_FREE_RATE = 0.01
+# TradeAnalyzer's starting value for running minimums (backtrader.utils.py3.MAXINT).
+MAXINT = sys.maxsize
+
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if 0 < period <= len(values):
+        cs = np.concatenate(([0.0], np.cumsum(values)))
+        out[period - 1 :] = (cs[period:] - cs[:-period]) / period
+    return out
+
+
+def crossover(fast: np.ndarray, slow: np.ndarray, first_valid: int) -> np.ndarray:
+    """+1/-1 where Backtrader's CrossOver(fast, slow) fires, 0 elsewhere."""
+    cross = np.zeros(len(fast), dtype=np.int8)
+    if first_valid + 1 >= len(fast):
+        return cross
+    diff = fast[first_valid:] - slow[first_valid:]
+    # NonZeroDifference: carry the last non-zero difference forward.
+    last_nonzero = np.where(diff != 0, np.arange(len(diff)), 0)
+    np.maximum.accumulate(last_nonzero, out=last_nonzero)
+    before = diff[last_nonzero][:-1]
+    after = diff[1:]
+    cross[first_valid + 1 :] = ((before < 0) & (after > 0)).astype(np.int8) - ((before > 0) & (after < 0)).astype(np.int8)
+    return cross
+
+
+def simulate_long_only(
+    open_: np.ndarray,
+    close: np.ndarray,
+    signals: np.ndarray,
+    start_cash: float,
+    risk_pct: float,
+    commission: float,
+) -> tuple[np.ndarray, list[tuple[int, float, str]], list[tuple[float, float, int]], bool]:
+    """Enter on +1, exit on -1; market orders fill at the next bar's open like Backtrader's broker.
+
+    Returns the per-bar portfolio value, fills as (bar, price, side), closed trades as
+    (gross pnl, net pnl, bars held) and whether a position is still open on the last bar.
+    """
+    n = len(close)
+    cash = float(start_cash)
+    size = 0
+    entry_price = entry_comm = 0.0
+    entry_bar = 0
+    pending: tuple[int, str, int] | None = None
+    fills: list[tuple[int, float, str]] = []
+    trades: list[tuple[float, float]] = []
+    change_bars = [0]
+    cash_steps = [cash]
+    size_steps = [0]
+
+    def fill(bar: int, side: str, qty: int) -> None:
+        nonlocal cash, size, entry_price, entry_comm, entry_bar
+        price = float(open_[bar])
+        comm = qty * price * commission
+        if side == "buy":
+            if qty * price + comm > cash:
+                return  # broker rejects for insufficient cash
+            cash -= qty * price + comm
+            size, entry_price, entry_comm, entry_bar = qty, price, comm, bar
+        else:
+            cash += qty * price - comm
+            gross = qty * (price - entry_price)
+            trades.append((gross, gross - entry_comm - comm, bar - entry_bar))
+            size = 0
+        fills.append((bar, price, side))
+        change_bars.append(bar)
+        cash_steps.append(cash)
+        size_steps.append(size)
+
+    # Only bars with a signal can submit orders, and orders only fill on the bar after one.
+    for bar in np.flatnonzero(signals).tolist():
+        if pending is not None and pending[0] <= bar:
+            fill(*pending)
+            pending = None
+        if bar + 1 >= n:
+            break
+        if size == 0 and signals[bar] > 0:
+            price = float(close[bar])
+            qty = max(int(cash * (risk_pct / 100.0) / price), 1)
+            if qty * price * (1 + commission) <= cash:
+                pending = (bar + 1, "buy", qty)
+        elif size > 0 and signals[bar] < 0:
+            pending = (bar + 1, "sell", size)
+    if pending is not None:
+        fill(*pending)
+
+    step = np.searchsorted(np.asarray(change_bars), np.arange(n), side="right") - 1
+    equity = np.asarray(cash_steps)[step] + np.asarray(size_steps, dtype=np.float64)[step] * close
+    return equity, fills, trades, size > 0
+
+
+def drawdown_stats(equity: np.ndarray) -> dict:
+    peak = np.maximum.accumulate(equity)
+    moneydown = peak - equity
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = 100.0 * moneydown / peak
+    in_drawdown = drawdown != 0
+    # Length of each run of consecutive drawdown bars, counted the way DrawDown.next does.
+    run_ids = np.cumsum(~in_drawdown)
+    run_lengths = np.bincount(run_ids[in_drawdown]) if in_drawdown.any() else np.zeros(1, dtype=np.int64)
+    current_len = int(run_lengths[run_ids[-1]]) if len(equity) and in_drawdown[-1] else 0
+    return {
+        "len": current_len,
+        "drawdown": float(drawdown[-1]) if len(equity) else 0.0,
+        "moneydown": float(moneydown[-1]) if len(equity) else 0.0,
+        "max": {
+            "len": int(run_lengths.max()),
+            "drawdown": float(np.nanmax(drawdown)) if len(equity) else 0.0,
+            "moneydown": float(moneydown.max()) if len(equity) else 0.0,
+        },
+    }
+
+
+def returns_stats(equity: np.ndarray, index: pd.DatetimeIndex, start_cash: float) -> dict:
+    # ArrayOHLCVData keeps DataBase's default TimeFrame.Days, so Returns counts calendar days and annualizes by 252.
+    days = len(np.unique(index.to_numpy().astype("datetime64[D]")))
+    end_value = float(equity[-1]) if len(equity) else float(start_cash)
+    ratio = end_value / start_cash if start_cash else float("-inf")
+    rtot = math.log(ratio) if ratio > 0 else float("-inf")
+    ravg = rtot / days if days else 0.0
+    rnorm = math.expm1(ravg * TRADING_DAYS_PER_YEAR) if ravg > float("-inf") else ravg
+    return {"rtot": rtot, "ravg": ravg, "rnorm": rnorm, "rnorm100": rnorm * 100.0}
+
+
+def sharpe_stats(equity: np.ndarray, index: pd.DatetimeIndex, start_cash: float) -> dict:
+    # SharpeRatio_A: yearly returns from the last value of each year, population std, sqrt(1) scaling.
+    if not len(equity):
+        return {"sharperatio": None}
+    years = index.year.to_numpy()
+    year_end = np.flatnonzero(np.r_[years[1:] != years[:-1], True])
+    closes = equity[year_end]
+    previous = np.r_[start_cash, closes[:-1]]
+    excess = (closes / previous - 1.0 - SHARPE_RISK_FREE_RATE).tolist()
+    mean = sum(excess) / len(excess)
+    std = math.sqrt(sum((x - mean) ** 2 for x in excess) / len(excess))
+    return {"sharperatio": mean / std if std else None}
+
+
+def trade_stats(trades: list[tuple[float, float, int]], has_open: bool) -> tuple[dict, dict]:
+    """TradeAnalyzer- and SQN-shaped summaries of the closed trades.
+
+    Replays TradeAnalyzer.notify_trade trade by trade so running values (streaks, maxima and
+    minima, including MAXINT minimums on the empty short side) come out the same; every
+    simulated trade is long.
+    """
+    closed = len(trades)
+    total = closed + int(has_open)
+    if not total:
+        return {"total": {"total": 0}}, {"sqn": 0, "trades": 0}
+
+    summary: dict = {"total": {"total": total, "open": int(has_open)}}
+    if closed:
+        summary["total"]["closed"] = closed
+        streak = {"won": {"current": 0, "longest": 0}, "lost": {"current": 0, "longest": 0}}
+        pnl = {"gross": {"total": 0.0, "average": 0.0}, "net": {"total": 0.0, "average": 0.0}}
+        outcome = {wl: {"total": 0, "pnl": {"total": 0.0, "average": 0.0, "max": 0.0}} for wl in ("won", "lost")}
+        sides = {
+            side: {
+                "total": 0,
+                "pnl": {
+                    "total": 0.0,
+                    "average": 0.0,
+                    "won": {"total": 0.0, "average": 0.0, "max": 0.0},
+                    "lost": {"total": 0.0, "average": 0.0, "max": 0.0},
+                },
+                "won": 0,
+                "lost": 0,
+            }
+            for side in ("long", "short")
+        }
+        length: dict = {"total": 0, "average": 0.0, "max": 0, "min": MAXINT}
+        for wl in ("won", "lost"):
+            # "min" only appears once a trade of that outcome closes.
+            length[wl] = {"total": 0, "average": 0.0, "max": 0}
+        for side in ("long", "short"):
+            length[side] = {"total": 0, "average": 0.0, "max": 0, "min": MAXINT}
+            for wl in ("won", "lost"):
+                length[side][wl] = {"total": 0, "average": 0.0, "max": 0, "min": MAXINT}
+
+        is_side = {"long": 1, "short": 0}
+        for count, (gross, net, barlen) in enumerate(trades, start=1):
+            won = int(net >= 0.0)
+            flags = {"won": won, "lost": 1 - won}
+            for wl, flag in flags.items():
+                streak[wl]["current"] = streak[wl]["current"] * flag + flag
+                streak[wl]["longest"] = max(streak[wl]["longest"], streak[wl]["current"])
+
+            pnl["gross"]["total"] += gross
+            pnl["gross"]["average"] = pnl["gross"]["total"] / count
+            pnl["net"]["total"] += net
+            pnl["net"]["average"] = pnl["net"]["total"] / count
+
+            for wl, flag in flags.items():
+                stats = outcome[wl]
+                stats["total"] += flag
+                value = net * flag
+                stats["pnl"]["total"] += value
+                stats["pnl"]["average"] = stats["pnl"]["total"] / (stats["total"] or 1.0)
+                stats["pnl"]["max"] = (max if wl == "won" else min)(stats["pnl"]["max"], value)
+
+            for side, on_side in is_side.items():
+                stats = sides[side]
+                stats["total"] += on_side
+                stats["pnl"]["total"] += net * on_side
+                stats["pnl"]["average"] = stats["pnl"]["total"] / (stats["total"] or 1.0)
+                for wl, flag in flags.items():
+                    value = net * flag * on_side
+                    stats[wl] += flag * on_side
+                    wl_pnl = stats["pnl"][wl]
+                    wl_pnl["total"] += value
+                    wl_pnl["average"] = wl_pnl["total"] / (stats[wl] or 1.0)
+                    wl_pnl["max"] = (max if wl == "won" else min)(wl_pnl["max"], value)
+
+            length["total"] += barlen
+            length["average"] = length["total"] / count
+            length["max"] = max(length["max"], barlen)
+            length["min"] = min(length["min"] or MAXINT, barlen)
+            for wl, flag in flags.items():
+                stats = length[wl]
+                stats["total"] += barlen * flag
+                stats["average"] = stats["total"] / (outcome[wl]["total"] or 1.0)
+                stats["max"] = max(stats["max"], barlen * flag)
+                if barlen * flag:
+                    stats["min"] = min(stats.get("min") or MAXINT, barlen)
+            for side, on_side in is_side.items():
+                stats = length[side]
+                side_len = barlen * on_side
+                stats["total"] += side_len
+                stats["average"] = stats["total"] / (sides[side]["total"] or 1.0)
+                stats["max"] = max(stats["max"], side_len)
+                stats["min"] = min(stats["min"] or MAXINT, side_len or stats["min"] or MAXINT)
+                for wl, flag in flags.items():
+                    wl_len = barlen * on_side * flag
+                    wl_stats = stats[wl]
+                    wl_stats["total"] += wl_len
+                    wl_stats["average"] = wl_stats["total"] / (sides[side][wl] or 1.0)
+                    wl_stats["max"] = max(wl_stats["max"], wl_len)
+                    wl_stats["min"] = min(wl_stats["min"] or MAXINT, wl_len or wl_stats["min"] or MAXINT)
+
+        summary.update(streak=streak, pnl=pnl, won=outcome["won"], lost=outcome["lost"])
+        summary.update(long=sides["long"], short=sides["short"], len=length)
+
+    sqn: float | None = 0
+    net_pnls = [t[1] for t in trades]
+    if closed > 1:
+        mean = sum(net_pnls) / closed
+        std = math.sqrt(sum((p - mean) ** 2 for p in net_pnls) / closed)
+        sqn = math.sqrt(closed) * mean / std if std else None
+    return summary, {"sqn": sqn, "trades": closed}
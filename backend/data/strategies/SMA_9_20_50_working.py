@@ -78,6 +78,17 @@ class Strategy(bt.Strategy):
         self.pullback_seen = False
         self.order = None
 
+    def nextstart(self):
+        # Line buffers are complete from here on: read their backing arrays by bar index
+        # instead of going through LineBuffer.__getitem__ for every value in next().
+        self._close = self.data.close.array
+        self._sma9 = self.sma9.array
+        self._sma20 = self.sma20.array
+        self._sma50 = self.sma50.array
+        self._cross9 = self.cross_sma9.array
+        self._cross20 = self.cross_sma20.array
+        self.next()
+
     def notify_order(self, order):
         if order.status in (order.Completed, order.Canceled, order.Rejected):
             self.order = None
@@ -85,25 +96,26 @@ class Strategy(bt.Strategy):
     def next(self):
         if self.order:
             return
+        i = len(self.data) - 1
 
         # 4) Exit: Close crosses SMA20 down
         if self.position:
-            if self.cross_sma20[0] < 0:
+            if self._cross20[i] < 0:
                 self.order = self.close()
             return
 
         # 1) Trend filter: SMA20 > SMA50
-        trend_up = self.sma20[0] > self.sma50[0]
+        trend_up = self._sma20[i] > self._sma50[i]
         if not trend_up:
             self.pullback_seen = False
             return
 
         # 2) First pullback: Close below SMA9
-        if self.data.close[0] < self.sma9[0]:
+        if self._close[i] < self._sma9[i]:
             self.pullback_seen = True
 
         # 3) Entry: after pullback, Close crosses SMA9 up
-        if self.pullback_seen and self.cross_sma9[0] > 0:
+        if self.pullback_seen and self._cross9[i] > 0:
             # Simple sizing placeholder:
             # If your runtime provides a risk-based sizer, use it.
             # Otherwise, buy 1 unit.
@@ -8,6 +8,10 @@ PARAMS = {
     "risk_pct": 10.0,
 }
 
+# next() below is the plain SMA crossover, so BacktestService may run it with its NumPy engine.
+# Remove this line if you change the trading logic.
+VECTORIZED = "sma_cross"
+
 
 class Strategy(bt.Strategy):
     params = dict(
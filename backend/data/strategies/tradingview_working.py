@@ -20,10 +20,26 @@ class Strategy(bt.Strategy):
     )
 
     def __init__(self):
-        self.atr = bt.indicators.ATR(self.data, period=int(self.p.atr_period))
+        # ATR is kept inline (true range, SMA seed, then Wilder smoothing, as bt.indicators.ATR does).
+        self._tr_seed = []
+        self._atr = math.nan
         self._trail = None
         self._prev_src = None
 
+    def _update_atr(self) -> None:
+        if len(self.data) < 2:
+            return
+        prev_close = self.data.close[-1]
+        tr = max(self.data.high[0], prev_close) - min(self.data.low[0], prev_close)
+        period = int(self.p.atr_period)
+        if len(self._tr_seed) < period:
+            self._tr_seed.append(tr)
+            if len(self._tr_seed) == period:
+                self._atr = math.fsum(self._tr_seed) / period
+        else:
+            alpha = 1.0 / period
+            self._atr = self._atr * (1.0 - alpha) + tr * alpha
+
     def _src(self) -> float:
         if int(self.p.use_heikin_ashi):
             # Heikin-Ashi close approximation for current bar.
@@ -33,7 +49,11 @@ class Strategy(bt.Strategy):
         return float(self.data.close[0])
 
     def next(self):
-        atr_now = float(self.atr[0])
+        self._update_atr()
+        # Same warm-up as bt.indicators.ATR: no trading logic until atr_period true ranges exist.
+        if len(self.data) <= int(self.p.atr_period):
+            return
+        atr_now = self._atr
         if math.isnan(atr_now) or atr_now <= 0:
             return
 